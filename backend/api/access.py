@@ -11,11 +11,12 @@ router = APIRouter(prefix="/api/access", tags=["access"])
 class CreateKeyRequest(BaseModel):
     name: str
     rate_limit_per_minute: Optional[int] = 60
+    rate_limit_burst: Optional[int] = None
 
 @router.post("/keys")
 async def create_key(req: CreateKeyRequest):
     try:
-        res = await access_service.create_api_key(req.name, req.rate_limit_per_minute or 60)
+        res = await access_service.create_api_key(req.name, req.rate_limit_per_minute or 60, req.rate_limit_burst)
         return {"success": True, **res}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
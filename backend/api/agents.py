@@ -1,7 +1,9 @@
 """
 Agent API endpoints for Universal Agent Platform
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Response
+from fastapi.responses import StreamingResponse
+from api.responses import dumps, orjson_response
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import base64
@@ -24,6 +26,9 @@ class ChatRequest(BaseModel):
 class DeployAgentRequest(BaseModel):
     room_name: str
 
+class ResponseCacheRequest(BaseModel):
+    enabled: bool
+
 @router.get("/templates")
 async def get_agent_templates():
     """Get available agent templates"""
@@ -32,8 +37,8 @@ async def get_agent_templates():
         "message": "Agent templates retrieved successfully"
     }
 
-@router.post("", response_model=Dict[str, Any])
-async def create_agent(request: CreateAgentRequest):
+@router.post("")
+async def create_agent(response: Response, request: CreateAgentRequest):
     """Create a new voice agent"""
     try:
         agent_id = await agent_service.create_agent(
@@ -42,28 +47,37 @@ async def create_agent(request: CreateAgentRequest):
             custom_config=request.custom_config
         )
         agent = agent_service.get_agent(agent_id)
-        return {
+        return orjson_response({
             "success": True,
             "agent_id": agent_id,
             "agent": agent,
             "message": f"Agent created successfully"
-        }
+        }, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[Dict[str, Any]])
-async def list_agents():
-    """Get all agents from database"""
-    agents = await mongodb_repository.list_agents()
-    return agents
+@router.get("")
+async def list_agents(
+    response: Response,
+    status: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None,
+):
+    """Get one page of agents from database; the next page cursor is in X-Next-Cursor"""
+    agents = await mongodb_repository.list_agents(status=status, view=view, limit=limit, after=after)
+    next_cursor = mongodb_repository.next_cursor(agents, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orjson_response(agents, response)
 
 @router.get("/{agent_id}")
-async def get_agent(agent_id: str):
+async def get_agent(response: Response, agent_id: str):
     """Get specific agent details"""
     agent = agent_service.get_agent(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return {"agent": agent, "message": "Agent retrieved successfully"}
+    return orjson_response({"agent": agent, "message": "Agent retrieved successfully"}, response)
 
 @router.post("/{agent_id}/deploy")
 async def deploy_agent(agent_id: str, request: DeployAgentRequest):
@@ -98,6 +112,32 @@ async def chat_with_agent(agent_id: str, request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{agent_id}/chat/stream")
+async def stream_chat_with_agent(agent_id: str, request: ChatRequest):
+    """Chat with an agent as Server-Sent Events: start, delta (text chunks), then done or error.
+
+    The done event carries the same fields as POST /{agent_id}/chat plus first_token_ms.
+    """
+    if agent_service.get_agent(agent_id) is None:
+        raise HTTPException(status_code=404, detail=f"Agent {agent_id} not found")
+    events = agent_service.stream_user_message(
+        agent_id=agent_id,
+        message=request.message,
+        user_id=request.user_id,
+        session_id=request.session_id
+    )
+
+    async def sse():
+        async for event in events:
+            yield b"event: " + event["event"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        # no caching, and no proxy buffering that would hold tokens back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{agent_id}/voice")
 async def voice_chat_with_agent(
     agent_id: str,
@@ -122,6 +162,13 @@ async def voice_chat_with_agent(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/{agent_id}/response-cache")
+async def set_agent_response_cache(agent_id: str, request: ResponseCacheRequest):
+    """Opt an agent in or out of reusing replies to repeated questions"""
+    if not await agent_service.set_response_cache(agent_id, request.enabled):
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return {"success": True, "agent_id": agent_id, "response_cache_enabled": request.enabled}
+
 @router.delete("/{agent_id}")
 async def remove_agent(agent_id: str):
     """Remove an agent"""
@@ -3,33 +3,24 @@ Analytics API: High-level platform analytics
 """
 from fastapi import APIRouter
 from services.agent_service import agent_service
+from services.ai_service import ai_service
+from services.response_cache import response_cache
+from services.voice_service import voice_service
 from services.session_service import session_service
+from services.rollup_service import rollup_service
 from services.access_service import access_service
+from repositories.mongodb_repository import mongodb_repository
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 @router.get("/overview")
 async def overview():
-    # Active agents and sessions
-    agents = agent_service.get_all_agents()
-    sessions = await session_service.list_sessions(limit=100)
-    total_agents = len(agents)
-    total_sessions = len(sessions)
-
-    # Audio success rate (last 100 messages sampled from sessions)
-    # For simplicity, approximate by counting agent messages with audio_generated flag present in content
-    audio_success = 0
-    audio_attempts = 0
-    # Fetch latest 100 agent messages across sessions
-    # We read directly from session_service.messages collection
-    cursor = session_service.messages.find({"role": "agent"}).sort("timestamp", -1).limit(100)
-    async for m in cursor:
-        content = m.get("content", {})
-        if "audio_generated" in content:
-            audio_attempts += 1
-            if content.get("audio_generated"):
-                audio_success += 1
-    audio_rate = (audio_success / audio_attempts) * 100 if audio_attempts else None
+    """Exact platform totals: one read of the all-time rollup plus unflushed local counts"""
+    totals = await rollup_service.live_totals()
+    attempts = totals.get("audio_attempts", 0)
+    audio_rate = (totals.get("audio_successes", 0) / attempts) * 100 if attempts else None
+    cache_lookups = totals.get("cache_lookups", 0)
+    cache_rate = (totals.get("cache_hits", 0) / cache_lookups) * 100 if cache_lookups else None
 
     # API key enforcement state
     enforced = await access_service.is_enforced()
@@ -37,9 +28,39 @@ async def overview():
     return {
         "success": True,
         "metrics": {
-            "total_agents": total_agents,
-            "total_sessions": total_sessions,
+            "total_agents": len(agent_service.active_agents),
+            "total_sessions": totals.get("conversations", 0),
+            "agent_messages": totals.get("agent_messages", 0),
+            "audio_attempts": attempts,
             "audio_success_rate_pct": audio_rate,
+            "audio_by_provider": totals.get("audio_by_provider", {}),
+            "response_cache_lookups": cache_lookups,
+            "response_cache_hit_rate_pct": cache_rate,
             "api_key_enforced": enforced,
         }
-    }
\ No newline at end of file
+    }
+
+@router.get("/caches")
+async def caches():
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "success": True,
+        "caches": {
+            "api_keys": access_service.cache_stats(),
+            "known_sessions": session_service.cache_stats(),
+            "repository": mongodb_repository.cache_stats(),
+            "ai_sessions": ai_service.active_chats.stats(),
+            "responses": response_cache.stats(),
+        }
+    }
+
+@router.get("/coalescing")
+async def coalescing():
+    """How many identical concurrent provider calls joined an in-flight one instead of running"""
+    return {
+        "success": True,
+        "single_flight": {
+            "ai_completions": ai_service.completions.stats(),
+            "tts": voice_service.tts_calls.stats(),
+        }
+    }
@@ -1,12 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional, List
-import stripe
 import os
 from datetime import datetime
-
-# Initialize Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+from services.payment_service import get_stripe
 
 router = APIRouter()
 
@@ -75,6 +72,7 @@ async def get_pricing():
 @router.post("/create-customer")
 async def create_customer(email: str, name: Optional[str] = None):
     """Create a new Stripe customer"""
+    stripe = get_stripe()
     try:
         customer = stripe.Customer.create(
             email=email,
@@ -95,6 +93,7 @@ async def create_customer(email: str, name: Optional[str] = None):
 @router.post("/create-payment-intent")
 async def create_payment_intent(request: CreatePaymentIntentRequest):
     """Create a payment intent for one-time payments"""
+    stripe = get_stripe()
     try:
         intent = stripe.PaymentIntent.create(
             amount=request.amount,
@@ -115,6 +114,7 @@ async def create_payment_intent(request: CreatePaymentIntentRequest):
 @router.post("/create-subscription")
 async def create_subscription(request: CreateSubscriptionRequest):
     """Create a new subscription"""
+    stripe = get_stripe()
     try:
         # Create customer if not exists
         customer = stripe.Customer.create(
@@ -151,6 +151,7 @@ async def create_subscription(request: CreateSubscriptionRequest):
 @router.get("/subscription/{subscription_id}")
 async def get_subscription(subscription_id: str):
     """Get subscription details"""
+    stripe = get_stripe()
     try:
         subscription = stripe.Subscription.retrieve(subscription_id)
         return {
@@ -170,6 +171,7 @@ async def get_subscription(subscription_id: str):
 @router.put("/subscription/{subscription_id}")
 async def update_subscription(subscription_id: str, request: UpdateSubscriptionRequest):
     """Update subscription (upgrade/downgrade)"""
+    stripe = get_stripe()
     try:
         subscription = stripe.Subscription.retrieve(subscription_id)
         
@@ -194,6 +196,7 @@ async def update_subscription(subscription_id: str, request: UpdateSubscriptionR
 @router.delete("/subscription/{subscription_id}")
 async def cancel_subscription(subscription_id: str):
     """Cancel a subscription"""
+    stripe = get_stripe()
     try:
         subscription = stripe.Subscription.delete(subscription_id)
         return {
@@ -207,6 +210,7 @@ async def cancel_subscription(subscription_id: str):
 @router.get("/customer/{customer_id}/subscriptions")
 async def get_customer_subscriptions(customer_id: str):
     """Get all subscriptions for a customer"""
+    stripe = get_stripe()
     try:
         subscriptions = stripe.Subscription.list(customer=customer_id)
         return {
@@ -227,6 +231,7 @@ async def get_customer_subscriptions(customer_id: str):
 @router.post("/webhook")
 async def stripe_webhook(request: Request):
     """Handle Stripe webhooks"""
+    stripe = get_stripe()
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
     endpoint_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
@@ -295,6 +300,7 @@ async def get_usage_metrics(customer_id: str):
 @router.post("/create-portal-session")
 async def create_portal_session(customer_id: str, return_url: str):
     """Create a Stripe customer portal session"""
+    stripe = get_stripe()
     try:
         session = stripe.billing_portal.Session.create(
             customer=customer_id,
@@ -0,0 +1,49 @@
+"""
+Response serialization for the AImpact API
+- ORJSONResponse renders with orjson; ObjectId, datetime and UUID values are encoded natively
+- It is the app's default response class; routes that return raw Mongo documents
+  return orjson_response(...) explicitly, which skips jsonable_encoder and response_model validation
+- FastAPI only applies headers set on the injected Response (rate-limit headers from
+  require_api_key, X-Next-Cursor) to responses it builds itself; orjson_response copies them
+- dumps() is the same encoder for code that streams JSON itself
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def orjson_response(content: Any, response: Response) -> ORJSONResponse:
+    """ORJSONResponse for `content` carrying the headers and status set on the request's injected Response"""
+    out = ORJSONResponse(content, status_code=response.status_code or 200)
+    out.raw_headers.extend(response.raw_headers)
+    return out
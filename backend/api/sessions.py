@@ -1,30 +1,100 @@
 """
 Sessions API: List and export conversation transcripts
 """
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+import zlib
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from api.responses import dumps, orjson_response
+from typing import Optional, AsyncIterator
 from services.session_service import session_service
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
+# flush streamed output to the client roughly every 64KB
+EXPORT_CHUNK_BYTES = 64 * 1024
+
 @router.get("")
-async def list_sessions(agent_id: Optional[str] = None, user_id: Optional[str] = None, limit: int = 50):
+async def list_sessions(
+    response: Response,
+    agent_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+):
+    """List sessions newest-first; follow `next_cursor` via `after` for the next page"""
     try:
-        sessions = await session_service.list_sessions(agent_id=agent_id, user_id=user_id, limit=limit)
-        return {"success": True, "sessions": sessions}
+        sessions = await session_service.list_sessions(agent_id=agent_id, user_id=user_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    next_cursor = session_service.encode_cursor(sessions[-1]) if len(sessions) == limit else None
+    return orjson_response({"success": True, "sessions": sessions, "next_cursor": next_cursor}, response)
 
 @router.get("/{session_id}")
-async def get_session(session_id: str):
+async def get_session(response: Response, session_id: str):
     sess = await session_service.get_session(session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
-    return {"success": True, "session": sess}
+    return orjson_response({"success": True, "session": sess}, response)
+
+async def _export_lines(session: dict, session_id: str, fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    """Yield the export document piece by piece: NDJSON lines or one chunked JSON object"""
+    if fmt == "ndjson":
+        yield dumps({"session": session}) + b"\n"
+        async for m in session_service.iter_messages(session_id, batch_size=batch_size):
+            yield dumps(m) + b"\n"
+        return
+    # same shape as the buffered JSON export, emitted incrementally
+    yield b'{"success":true,"session":' + dumps(session) + b',"messages":['
+    first = True
+    async for m in session_service.iter_messages(session_id, batch_size=batch_size):
+        yield (b"" if first else b",") + dumps(m)
+        first = False
+    yield b"]}"
+
+async def _export_stream(session: dict, session_id: str, fmt: str, batch_size: int, gzip: bool) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+    buf: list[bytes] = []
+    size = 0
+    async for data in _export_lines(session, session_id, fmt, batch_size):
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            buf.append(data)
+            size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if compressor:
+        buf.append(compressor.flush())
+    if buf:
+        yield b"".join(buf)
 
 @router.get("/{session_id}/export")
-async def export_session(session_id: str):
-    data = await session_service.export_session(session_id)
-    if data.get("error"):
-        raise HTTPException(status_code=404, detail=data["error"])
-    return {"success": True, **data}
\ No newline at end of file
+async def export_session(
+    response: Response,
+    session_id: str,
+    format: str = Query("json", pattern="^(json|ndjson|json-stream)$"),
+    batch_size: int = Query(500, ge=1, le=10000),
+    gzip: bool = False,
+):
+    """Export a transcript. `ndjson` and `json-stream` stream from the cursor with flat memory use."""
+    if format == "json":
+        data = await session_service.export_session(session_id)
+        if data.get("error"):
+            raise HTTPException(status_code=404, detail=data["error"])
+        return orjson_response({"success": True, **data}, response)
+
+    sess = await session_service.get_session(session_id)
+    if not sess:
+        raise HTTPException(status_code=404, detail="Session not found")
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    headers = {"Content-Disposition": f'attachment; filename="session-{session_id}.{"ndjson" if format == "ndjson" else "json"}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_stream(sess, session_id, format, batch_size, gzip),
+        media_type=media_type,
+        headers=headers,
+    )
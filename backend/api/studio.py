@@ -9,6 +9,7 @@ from datetime import datetime
 
 from services.agent_service import agent_service
 from services.livekit_service import livekit_service
+from services.chat_history import DEFAULT_HISTORY_LIMIT
 
 router = APIRouter(prefix="/api/studio", tags=["studio"])
 
@@ -101,7 +102,7 @@ async def get_advanced_templates():
     templates = agent_service.get_agent_templates()
     for template_key, template in templates.items():
         template["advanced_config"] = {
-            "conversation_flow": {"greeting_enabled": True, "context_memory": True, "conversation_history_limit": 50},
+            "conversation_flow": {"greeting_enabled": True, "context_memory": True, "conversation_history_limit": template.get("conversation_history_limit", DEFAULT_HISTORY_LIMIT)},
             "voice_settings": {"stability": 0.7, "similarity_boost": 0.8, "style": 0.5},
             "ai_settings": {"temperature": 0.7, "max_tokens": 4096, "top_p": 0.9}
         }
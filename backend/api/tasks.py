@@ -1,6 +1,7 @@
 """Tasks API endpoints"""
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from api.responses import orjson_response
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from repositories.mongodb_repository import mongodb_repository
@@ -8,47 +9,81 @@ from middleware.auth import require_api_key
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+# items per batch request; the driver splits larger writes into several round-trips anyway
+MAX_BATCH_SIZE = 10000
+
 @router.get("/")
 async def list_tasks(
+    response: Response,
     owner_id: Optional[str] = None,
     status: Optional[str] = None,
-    workflow_id: Optional[str] = None
+    workflow_id: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None
 ) -> List[Dict[str, Any]]:
-    """List all tasks with optional filters"""
+    """List tasks with optional filters; the next page cursor is in X-Next-Cursor"""
     try:
         tasks = await mongodb_repository.list_tasks(
             owner_id=owner_id,
             status=status,
-            workflow_id=workflow_id
+            workflow_id=workflow_id,
+            view=view,
+            limit=limit,
+            after=after
         )
-        return tasks
+        next_cursor = mongodb_repository.next_cursor(tasks, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return orjson_response(tasks, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def bulk_create_tasks(response: Response, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create many tasks in one round-trip; returns a result per item"""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+    try:
+        return orjson_response(await mongodb_repository.bulk_create_tasks(items), response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/batch")
+async def bulk_update_tasks(response: Response, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Update many tasks; each item is {"task_id": ..., "update": {...}}"""
+    if len(updates) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+    try:
+        return orjson_response(await mongodb_repository.bulk_update_tasks(updates), response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{task_id}")
-async def get_task(task_id: str) -> Dict[str, Any]:
+async def get_task(response: Response, task_id: str) -> Dict[str, Any]:
     """Get a specific task by ID"""
     try:
         task = await mongodb_repository.get_task(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        return task
+        return orjson_response(task, response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-async def create_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
+async def create_task(response: Response, task_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new task"""
     try:
         task = await mongodb_repository.create_task(task_data)
-        return task
+        return orjson_response(task, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{task_id}")
 async def update_task(
+    response: Response,
     task_id: str,
     task_data: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -57,7 +92,7 @@ async def update_task(
         task = await mongodb_repository.update_task(task_id, task_data)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        return task
+        return orjson_response(task, response)
     except HTTPException:
         raise
     except Exception as e:
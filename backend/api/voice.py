@@ -22,7 +22,7 @@ class CloneVoiceRequest(BaseModel):
 async def text_to_speech(request: TTSRequest):
     """Convert text to speech"""
     try:
-        audio_base64 = await voice_service.text_to_speech(
+        audio_base64, provider_used = await voice_service.synthesize(
             text=request.text,
             voice_id=request.voice_id,
             voice_profile=request.voice_profile
@@ -31,7 +31,7 @@ async def text_to_speech(request: TTSRequest):
             "success": audio_base64 is not None,
             "audio_base64": audio_base64,
             "voice_profile": request.voice_profile,
-            "provider_used": voice_service.last_provider,
+            "provider_used": provider_used,
             "text_length": len(request.text)
         }
     except Exception as e:
@@ -1,6 +1,7 @@
 """Workflows API endpoints"""
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from api.responses import orjson_response
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from repositories.mongodb_repository import mongodb_repository
@@ -8,45 +9,79 @@ from middleware.auth import require_api_key
 
 router = APIRouter(prefix="/api/workflows", tags=["workflows"])
 
+# items per batch request; the driver splits larger writes into several round-trips anyway
+MAX_BATCH_SIZE = 10000
+
 @router.get("/")
 async def list_workflows(
+    response: Response,
     owner_id: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None
 ) -> List[Dict[str, Any]]:
-    """List all workflows with optional filters"""
+    """List workflows with optional filters; the next page cursor is in X-Next-Cursor"""
     try:
         workflows = await mongodb_repository.list_workflows(
             owner_id=owner_id,
-            status=status
+            status=status,
+            view=view,
+            limit=limit,
+            after=after
         )
-        return workflows
+        next_cursor = mongodb_repository.next_cursor(workflows, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return orjson_response(workflows, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def bulk_create_workflows(response: Response, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create many workflows in one round-trip; returns a result per item"""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+    try:
+        return orjson_response(await mongodb_repository.bulk_create_workflows(items), response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/batch")
+async def bulk_update_workflows(response: Response, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Update many workflows; each item is {"workflow_id": ..., "update": {...}}"""
+    if len(updates) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+    try:
+        return orjson_response(await mongodb_repository.bulk_update_workflows(updates), response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{workflow_id}")
-async def get_workflow(workflow_id: str) -> Dict[str, Any]:
+async def get_workflow(response: Response, workflow_id: str) -> Dict[str, Any]:
     """Get a specific workflow by ID"""
     try:
         workflow = await mongodb_repository.get_workflow(workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
-        return workflow
+        return orjson_response(workflow, response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-async def create_workflow(workflow_data: Dict[str, Any]) -> Dict[str, Any]:
+async def create_workflow(response: Response, workflow_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new workflow"""
     try:
         workflow = await mongodb_repository.create_workflow(workflow_data)
-        return workflow
+        return orjson_response(workflow, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{workflow_id}")
 async def update_workflow(
+    response: Response,
     workflow_id: str,
     workflow_data: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -55,7 +90,7 @@ async def update_workflow(
         workflow = await mongodb_repository.update_workflow(workflow_id, workflow_data)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
-        return workflow
+        return orjson_response(workflow, response)
     except HTTPException:
         raise
     except Exception as e:
@@ -2,12 +2,13 @@
 Auth middleware/dependency for API key enforcement with soft-enable behavior.
 If at least one API key exists in DB, enforcement is ON. Otherwise, endpoints allow open access.
 """
-from fastapi import Depends, Header, HTTPException, Request
+from fastapi import Depends, Header, HTTPException, Request, Response
 from typing import Optional
 from services.access_service import access_service
 
 async def require_api_key(
     request: Request,
+    response: Response,
     x_api_key: Optional[str] = Header(default=None, alias="x-api-key"),
     authorization: Optional[str] = Header(default=None, alias="Authorization"),
 ):
@@ -27,14 +28,18 @@ async def require_api_key(
     if not doc:
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
-    # basic per-minute rate limit
+    # per-key GCRA rate limit: sustained rate plus burst allowance
     limit = int(doc.get("rate_limit_per_minute", 60))
-    allowed = await access_service.rate_limit_check(doc["_id"], limit)
-    if not allowed:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    burst = int(doc.get("rate_limit_burst") or limit)
+    rate = await access_service.rate_limit_check(doc["_id"], limit, burst)
+    if not rate.allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=rate.headers())
+    response.headers.update(rate.headers())
 
-    # record usage (endpoint path is in request.url.path)
-    await access_service.record_usage(doc, request.url.path)
+    # record usage without waiting on the database; the route template keeps
+    # per-endpoint counters bounded (falls back to the raw path)
+    route = request.scope.get("route")
+    access_service.record_usage(doc, getattr(route, "path", None) or request.url.path)
     # attach to request state for downstream
     request.state.api_key = doc
     return doc
\ No newline at end of file
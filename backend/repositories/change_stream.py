@@ -0,0 +1,99 @@
+"""Change-stream cache invalidation for MongoDBRepository
+- Watches the cached collections and evicts documents changed by any process
+- Needs a replica set (a single-node one is enough); standalone servers are detected and skipped
+- On a broken stream the caches are cleared, since events may have been missed, and it restarts
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# server error for "The $changeStream stage is only supported on replica sets"
+_NOT_A_REPLICA_SET = 40573
+
+
+class ChangeStreamInvalidator:
+    """Background task feeding change events into repository.invalidate_cached"""
+
+    def __init__(self, db, repository, collections: Dict[str, str], retry_delay: float = 2.0):
+        self.db = db
+        self.repository = repository
+        self.collections = collections  # collection name -> id field the cache is keyed by
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self.events = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="repo-cache-invalidator")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _pipeline(self):
+        return [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+
+    def handle(self, change: Dict[str, Any]) -> None:
+        """Evict whatever a single change event may have made stale"""
+        self.events += 1
+        name = change.get("ns", {}).get("coll")
+        id_field = self.collections.get(name)
+        if id_field is None:
+            return
+        doc = change.get("fullDocument") or {}
+        key = doc.get(id_field)
+        if change.get("operationType") in ("insert", "update", "replace") and key is not None:
+            self.repository.invalidate_cached(name, [key])
+        else:
+            # deletes only carry _id, and drops/renames affect everything: clear the collection
+            self.repository.invalidate_cached(name)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.db.watch(self._pipeline(), full_document="updateLookup",
+                                         resume_after=self._resume_token) as stream:
+                    logger.info("Repository cache change stream started")
+                    async for change in stream:
+                        self.handle(change)
+                        self._resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == _NOT_A_REPLICA_SET:
+                    logger.warning("Change streams need a replica set; repository cache relies on TTL only")
+                    self.last_error = str(e)
+                    return
+                self._on_error(e)
+            except Exception as e:
+                self._on_error(e)
+            await asyncio.sleep(self.retry_delay)
+
+    def _on_error(self, e: Exception) -> None:
+        self.errors += 1
+        self.last_error = str(e)
+        logger.error(f"Repository cache change stream failed, clearing caches and restarting: {e}")
+        # events may have been missed, and the old token may be past the oplog window
+        self._resume_token = None
+        for name in self.collections:
+            self.repository.invalidate_cached(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "events": self.events,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,226 @@
+"""Declarative MongoDB index management for Universal Agent Platform
+- IndexSpec / QueryShape describe the indexes we want and the queries we run
+- apply_indexes creates missing indexes idempotently and diffs against what exists
+- explain_audit runs every query shape through explain() and flags COLLSCANs
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson.son import SON
+
+logger = logging.getLogger(__name__)
+
+# options compared when deciding whether an existing index matches a spec
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One wanted index: ordered key pattern plus options"""
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    sparse: bool = False
+    partial: Optional[Dict[str, Any]] = None
+    expire_after_seconds: Optional[int] = None
+    name: Optional[str] = None
+
+    @property
+    def index_name(self) -> str:
+        return self.name or "_".join(f"{f}_{d}" for f, d in self.keys)
+
+    def options(self) -> Dict[str, Any]:
+        opts: Dict[str, Any] = {}
+        if self.unique:
+            opts["unique"] = True
+        if self.sparse:
+            opts["sparse"] = True
+        if self.partial:
+            opts["partialFilterExpression"] = self.partial
+        if self.expire_after_seconds is not None:
+            opts["expireAfterSeconds"] = self.expire_after_seconds
+        return opts
+
+    def same_keys(self, info: Dict[str, Any]) -> bool:
+        return [(f, int(d)) for f, d in info.get("key", [])] == list(self.keys)
+
+    def same_options(self, info: Dict[str, Any]) -> bool:
+        wanted = self.options()
+        for opt in _COMPARED_OPTIONS:
+            have = info.get(opt)
+            if opt in ("unique", "sparse"):
+                have = bool(have)
+                if have != bool(wanted.get(opt)):
+                    return False
+            elif have != wanted.get(opt):
+                return False
+        return True
+
+
+def index(*keys: Tuple[str, int], **options: Any) -> IndexSpec:
+    """Shorthand: index(("agent_id", 1), unique=True)"""
+    return IndexSpec(keys=tuple(keys), **options)
+
+
+@dataclass
+class QueryShape:
+    """A query the code actually runs, with representative values"""
+    collection: str
+    description: str
+    filter: Dict[str, Any] = field(default_factory=dict)
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: Optional[int] = None
+
+
+async def apply_indexes(db, specs: Dict[str, List[IndexSpec]], drop_unmanaged: bool = False,
+                        rebuild_conflicts: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Create missing indexes and report how each collection differs from its spec.
+
+    Per collection the report lists indexes that were created, already
+    matched, conflict with the spec (same keys or name, different options),
+    exist without being in the spec (unmanaged), were dropped, or failed.
+    Conflicting and unmanaged indexes are only dropped when asked to.
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+    for coll_name, wanted in specs.items():
+        coll = db[coll_name]
+        entry = {"created": [], "unchanged": [], "conflicts": [], "unmanaged": [], "dropped": [], "errors": []}
+        report[coll_name] = entry
+        try:
+            existing = await coll.index_information()
+        except Exception as e:
+            entry["errors"].append(f"index_information: {e}")
+            logger.error(f"Could not read indexes of {coll_name}: {e}")
+            continue
+
+        matched = {"_id_"}
+        for spec in wanted:
+            same = next((n for n, info in existing.items() if spec.same_keys(info) or n == spec.index_name), None)
+            if same is not None:
+                matched.add(same)
+                if spec.same_keys(existing[same]) and spec.same_options(existing[same]):
+                    entry["unchanged"].append(same)
+                    continue
+                if not rebuild_conflicts:
+                    entry["conflicts"].append(same)
+                    logger.warning(f"Index {coll_name}.{same} differs from spec {spec.index_name}; rebuild to apply")
+                    continue
+                try:
+                    await coll.drop_index(same)
+                    entry["dropped"].append(same)
+                except Exception as e:
+                    entry["errors"].append(f"{same}: {e}")
+                    logger.error(f"Failed to drop index {coll_name}.{same}: {e}")
+                    continue
+            try:
+                await coll.create_index(list(spec.keys), name=spec.index_name, **spec.options())
+                entry["created"].append(spec.index_name)
+            except Exception as e:
+                entry["errors"].append(f"{spec.index_name}: {e}")
+                logger.error(f"Failed to create index {coll_name}.{spec.index_name}: {e}")
+
+        for name in existing:
+            if name in matched:
+                continue
+            if drop_unmanaged:
+                try:
+                    await coll.drop_index(name)
+                    entry["dropped"].append(name)
+                except Exception as e:
+                    entry["errors"].append(f"{name}: {e}")
+            else:
+                entry["unmanaged"].append(name)
+    return report
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Flatten the stage names of an explain() plan tree"""
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("inputStage", "queryPlan", "winningPlan"):
+            if key in plan:
+                stages.extend(_plan_stages(plan[key]))
+        for child in plan.get("inputStages", []):
+            stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_audit(db, shapes: List[QueryShape]) -> List[Dict[str, Any]]:
+    """Explain each query shape and flag collection scans and in-memory sorts"""
+    findings: List[Dict[str, Any]] = []
+    for shape in shapes:
+        find: Dict[str, Any] = {"find": shape.collection, "filter": shape.filter}
+        if shape.sort:
+            find["sort"] = SON(shape.sort)
+        if shape.limit:
+            find["limit"] = shape.limit
+        try:
+            explained = await db.command(SON([("explain", SON(find)), ("verbosity", "queryPlanner")]))
+            stages = _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+            findings.append({
+                "collection": shape.collection,
+                "query": shape.description,
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+            })
+        except Exception as e:
+            findings.append({"collection": shape.collection, "query": shape.description, "error": str(e)})
+    return findings
+
+
+# Indexes backing the MongoDBRepository query shapes below. Ids that the
+# models do not always carry (workflow_id, task_id, session_id) are unique only
+# where present, so documents without them do not collide on null.
+_PRESENT = {"$exists": True}
+
+REPOSITORY_INDEXES: Dict[str, List[IndexSpec]] = {
+    "agents": [
+        index(("agent_id", 1), unique=True),
+        index(("status", 1), ("_id", -1)),
+    ],
+    "workflows": [
+        index(("workflow_id", 1), unique=True, partial={"workflow_id": _PRESENT}),
+    ],
+    "tasks": [
+        index(("task_id", 1), unique=True, partial={"task_id": _PRESENT}),
+        index(("workflow_id", 1), ("_id", -1)),
+        index(("agent_id", 1), ("_id", -1)),
+        index(("status", 1), ("_id", -1)),
+    ],
+    "sessions": [
+        index(("session_id", 1), unique=True, partial={"session_id": _PRESENT}),
+        index(("created_at", -1)),
+    ],
+    "session_message_buckets": [
+        # append targets the open bucket, reads walk newest-first
+        index(("session_id", 1), ("count", 1)),
+        # one bucket per sequence number, so concurrent appends cannot both open the next bucket
+        index(("session_id", 1), ("seq", 1), unique=True, partial={"seq": _PRESENT}),
+        index(("session_id", 1), ("first_ts", -1)),
+    ],
+}
+
+REPOSITORY_QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("agents", "get_agent", {"agent_id": "audit"}),
+    QueryShape("agents", "list_agents", {}, [("_id", -1)], 50),
+    QueryShape("agents", "list_agents(status)", {"status": "active"}, [("_id", -1)], 50),
+    QueryShape("workflows", "get_workflow", {"workflow_id": "audit"}),
+    QueryShape("workflows", "list_workflows / get_workflows", {}, [("_id", -1)], 50),
+    QueryShape("tasks", "get_task", {"task_id": "audit"}),
+    QueryShape("tasks", "list_tasks", {}, [("_id", -1)], 50),
+    QueryShape("tasks", "list_tasks(workflow_id)", {"workflow_id": "audit"}, [("_id", -1)], 50),
+    QueryShape("tasks", "list_tasks(agent_id)", {"agent_id": "audit"}, [("_id", -1)], 50),
+    QueryShape("tasks", "list_tasks(status)", {"status": "pending"}, [("_id", -1)], 50),
+    QueryShape("sessions", "get_session", {"session_id": "audit"}),
+    QueryShape("sessions", "get_conversations", {}, [("_id", -1)], 50),
+    QueryShape("sessions", "get_recent_conversations", {}, [("created_at", -1)], 5),
+    QueryShape("session_message_buckets", "add_session_message (open bucket)",
+               {"session_id": "audit", "count": {"$lt": 200}}),
+    QueryShape("session_message_buckets", "add_session_message (next seq)",
+               {"session_id": "audit", "seq": {"$exists": True}}, [("seq", -1)], 1),
+    QueryShape("session_message_buckets", "get_session_messages",
+               {"session_id": "audit"}, [("first_ts", -1)]),
+]
@@ -1,14 +1,43 @@
 """MongoDB Repository for Universal Agent Platform"""
 import os
+import copy
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from services.cache import TTLCache
+from services.mongo_client import mongo_registry
 from .models import AgentModel, WorkflowModel, TaskModel, SessionModel
+from .change_stream import ChangeStreamInvalidator
+from .indexes import REPOSITORY_INDEXES, REPOSITORY_QUERY_SHAPES, apply_indexes, explain_audit
 
 logger = logging.getLogger(__name__)
 
+# Session messages live in bucket documents of at most this many messages
+MESSAGE_BUCKET_SIZE = int(os.getenv("SESSION_MESSAGE_BUCKET_SIZE", "200"))
+# tries per append when racing other writers to open the next bucket
+BUCKET_APPEND_ATTEMPTS = 5
+
+# Large fields left out of "summary" list views; "full" returns whole documents
+SUMMARY_EXCLUDES = {
+    "agents": {"config": 0},
+    "workflows": {"steps": 0},
+    "tasks": {"input_data": 0, "output_data": 0, "metadata": 0},
+    "sessions": {"messages": 0, "context": 0, "metadata": 0},
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Read-through cache for documents read on every chat turn / workflow run: collection -> id field
+CACHED_COLLECTIONS = {"agents": "agent_id", "workflows": "workflow_id"}
+REPO_CACHE_SIZE = int(os.getenv("REPO_CACHE_SIZE", "1024"))
+REPO_CACHE_TTL = float(os.getenv("REPO_CACHE_TTL", "30"))
+# documents per cached collection loaded into the cache during startup warm-up
+REPO_CACHE_PRELOAD = int(os.getenv("REPO_CACHE_PRELOAD", "200"))
+
 class MongoDBRepository:
     """MongoDB Repository for managing platform data"""
     
@@ -19,131 +48,120 @@ class MongoDBRepository:
         self.workflows_collection = None
         self.tasks_collection = None
         self.sessions_collection = None
+        self.message_buckets_collection = None
+        self._doc_cache = {name: TTLCache(maxsize=REPO_CACHE_SIZE, ttl=REPO_CACHE_TTL) for name in CACHED_COLLECTIONS}
+        # bumped on every invalidation so a read racing a write does not cache the old document
+        self._cache_generation = {name: 0 for name in CACHED_COLLECTIONS}
+        self.cache_invalidator = None
     
-    async def connect(self):
-        """Connect to MongoDB"""
+    @staticmethod
+    def default_database():
+        """The repository's database (MONGODB_URL/MONGODB_DB_NAME), kept apart from the services' MONGO_URL/DB_NAME one"""
+        return mongo_registry.get_database(
+            os.getenv('MONGODB_DB_NAME', 'universal_agent_platform'),
+            os.getenv('MONGODB_URL', 'mongodb://localhost:27017'),
+        )
+
+    async def connect(self, db=None):
+        """Connect to MongoDB; binds to `db` when given, else to default_database()"""
         try:
-            mongodb_url = os.getenv('MONGODB_URL', 'mongodb://localhost:27017')
-            db_name = os.getenv('MONGODB_DB_NAME', 'universal_agent_platform')
-            
-            self.client = AsyncIOMotorClient(mongodb_url)
-            self.db = self.client[db_name]
+            # registry client: shared with the services when the URLs match
+            self.db = db if db is not None else self.default_database()
+            self.client = self.db.client
             
             # Initialize collections
             self.agents_collection = self.db.agents
             self.workflows_collection = self.db.workflows
             self.tasks_collection = self.db.tasks
             self.sessions_collection = self.db.sessions
+            self.message_buckets_collection = self.db.session_message_buckets
             
-            # Create indexes
-            await self._create_indexes()
+            await self.ensure_indexes()
+
+            if os.getenv("REPO_CACHE_CHANGE_STREAMS", "false").lower() in ("1", "true", "yes"):
+                # other processes write too: evict on their changes, not just ours
+                self.cache_invalidator = ChangeStreamInvalidator(self.db, self, CACHED_COLLECTIONS)
+                self.cache_invalidator.start()
             
-            logger.info(f"Connected to MongoDB: {mongodb_url}/{db_name}")
+            logger.info(f"Connected to MongoDB database {self.db.name}")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             return False
     
-    async def _create_indexes(self):
-        """Create database indexes for better performance"""
-        try:
-            # Agent indexes
-            await self.agents_collection.create_index("agent_id", unique=True)
-            await self.agents_collection.create_index("agent_type")
-            await self.agents_collection.create_index("status")
-            await self.agents_collection.create_index("owner_id")
-            
-            # Workflow indexes
-            await self.workflows_collection.create_index("workflow_id", unique=True)
-            await self.workflows_collection.create_index("status")
-            await self.workflows_collection.create_index("owner_id")
-            
-            # Task indexes
-            await self.tasks_collection.create_index("task_id", unique=True)
-            await self.tasks_collection.create_index("workflow_id")
-            await self.tasks_collection.create_index("agent_id")
-            await self.tasks_collection.create_index("status")
-            await self.tasks_collection.create_index("priority")
-            await self.tasks_collection.create_index("owner_id")
-            
-            # Session indexes
-            await self.sessions_collection.create_index("session_id", unique=True)
-            await self.sessions_collection.create_index("agent_id")
-            await self.sessions_collection.create_index("user_id")
-            await self.sessions_collection.create_index("status")
-            
-            logger.info("Database indexes created successfully")
-        except Exception as e:
-            logger.error(f"Failed to create indexes: {e}")
-    
     async def disconnect(self):
-        """Disconnect from MongoDB"""
+        """Release the repository's handles; the shared client is closed by the registry"""
+        if self.cache_invalidator:
+            await self.cache_invalidator.stop()
+            self.cache_invalidator = None
         if self.client:
-            self.client.close()
+            self.client = None
+            self.db = None
             print("Disconnected from MongoDB")
     
-    async def create_indexes(self):
-        """Create database indexes for better performance"""
-        try:
-            # Create indexes for agents collection
-            try:
-                await self.db.agents.create_index("agent_id", unique=True)
-            except Exception:
-                pass  # Index might already exist
-            try:
-                await self.db.agents.create_index("name")
-            except Exception:
-                pass
-            try:
-                await self.db.agents.create_index("agent_type")
-            except Exception:
-                pass
-            try:
-                await self.db.agents.create_index("status")
-            except Exception:
-                pass
-            
-            # Create indexes for workflows collection
-            try:
-                await self.db.workflows.create_index("name")
-            except Exception:
-                pass
-            try:
-                await self.db.workflows.create_index("type")
-            except Exception:
-                pass
-            
-            # Create indexes for tasks collection
-            try:
-                await self.db.tasks.create_index("title")
-            except Exception:
-                pass
-            try:
-                await self.db.tasks.create_index("status")
-            except Exception:
-                pass
-            try:
-                await self.db.tasks.create_index("priority")
-            except Exception:
-                pass
-            try:
-                await self.db.tasks.create_index("workflow_id")
-            except Exception:
-                pass
-            
-            # Create indexes for sessions collection
-            try:
-                await self.db.sessions.create_index("agent_id")
-            except Exception:
-                pass
-            try:
-                await self.db.sessions.create_index("status")
-            except Exception:
-                pass
-            
-            print("Database indexes created successfully")
-        except Exception as e:
-            print(f"Error creating indexes: {e}")
+    async def ensure_indexes(self, drop_unmanaged: bool = False, rebuild_conflicts: bool = False) -> Dict[str, Any]:
+        """Apply REPOSITORY_INDEXES idempotently and return the per-collection diff"""
+        report = await apply_indexes(self.db, REPOSITORY_INDEXES, drop_unmanaged, rebuild_conflicts)
+        for name, entry in report.items():
+            if entry["created"] or entry["conflicts"] or entry["unmanaged"]:
+                logger.info(f"Indexes {name}: created={entry['created']} conflicts={entry['conflicts']} "
+                            f"unmanaged={entry['unmanaged']}")
+        return report
+
+    async def explain_audit(self) -> List[Dict[str, Any]]:
+        """Explain every repository query shape; findings flag COLLSCANs"""
+        return await explain_audit(self.db, REPOSITORY_QUERY_SHAPES)
+
+    async def _cached_find_one(self, name: str, collection, key: str) -> Optional[Dict[str, Any]]:
+        """find_one by the collection's id field through the read-through cache"""
+        cache = self._doc_cache[name]
+        doc = cache.get(key)
+        if doc is None:
+            generation = self._cache_generation[name]
+            doc = await collection.find_one({CACHED_COLLECTIONS[name]: key})
+            if doc is None:
+                return None
+            if generation == self._cache_generation[name]:
+                cache.set(key, doc)
+        # callers mutate what they get back; never hand out the cached object
+        return copy.deepcopy(doc)
+
+    def invalidate_cached(self, name: str, keys: Optional[Iterable[str]] = None) -> None:
+        """Evict cached documents of a collection; keys=None evicts all of them"""
+        cache = self._doc_cache.get(name)
+        if cache is None:
+            return
+        self._cache_generation[name] += 1
+        if keys is None:
+            cache.clear()
+            return
+        for key in keys:
+            cache.pop(key)
+
+    async def preload_cache(self, name: str, query: Optional[Dict[str, Any]] = None,
+                            limit: int = REPO_CACHE_PRELOAD) -> int:
+        """Fill the read-through cache with the newest documents of a cached collection"""
+        cache = self._doc_cache[name]
+        key_field = CACHED_COLLECTIONS[name]
+        limit = min(limit, REPO_CACHE_SIZE)
+        if limit <= 0:
+            return 0
+        generation = self._cache_generation[name]
+        docs = await self.db[name].find(query or {}).sort("_id", -1).limit(limit).to_list(limit)
+        if generation != self._cache_generation[name]:
+            return 0  # written to meanwhile; let reads populate the cache instead
+        loaded = 0
+        for doc in docs:
+            if doc.get(key_field):
+                cache.set(doc[key_field], doc)
+                loaded += 1
+        return loaded
+
+    def cache_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {name: cache.stats() for name, cache in self._doc_cache.items()}
+        if self.cache_invalidator:
+            stats["change_stream"] = self.cache_invalidator.stats()
+        return stats
     
     # Agent CRUD operations
     async def create_agent(self, agent_data: Dict[str, Any]):
@@ -163,10 +181,7 @@ class MongoDBRepository:
     async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Get agent by ID"""
         try:
-            agent = await self.agents_collection.find_one({"agent_id": agent_id})
-            if agent:
-                agent["_id"] = str(agent["_id"])
-            return agent
+            return await self._cached_find_one("agents", self.agents_collection, agent_id)
         except Exception as e:
             logger.error(f"Failed to get agent {agent_id}: {e}")
             return None
@@ -179,6 +194,7 @@ class MongoDBRepository:
                 {"agent_id": agent_id},
                 {"$set": update_data}
             )
+            self.invalidate_cached("agents", [agent_id])
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Failed to update agent {agent_id}: {e}")
@@ -188,13 +204,16 @@ class MongoDBRepository:
         """Delete agent"""
         try:
             result = await self.agents_collection.delete_one({"agent_id": agent_id})
+            self.invalidate_cached("agents", [agent_id])
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Failed to delete agent {agent_id}: {e}")
             return False
     
-    async def list_agents(self, owner_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List agents with optional filters"""
+    async def list_agents(self, owner_id: Optional[str] = None, status: Optional[str] = None,
+                          view: str = "summary", limit: int = DEFAULT_PAGE_SIZE,
+                          after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List agents with optional filters, one keyset page at a time"""
         try:
             query = {}
             if owner_id:
@@ -202,13 +221,7 @@ class MongoDBRepository:
             if status:
                 query["status"] = status
             
-            cursor = self.agents_collection.find(query)
-            agents = await cursor.to_list(length=None)
-            
-            for agent in agents:
-                agent["_id"] = str(agent["_id"])
-            
-            return agents
+            return await self._find_page(self.agents_collection, "agents", query, view, limit, after)
         except Exception as e:
             logger.error(f"Failed to list agents: {e}")
             return []
@@ -231,10 +244,7 @@ class MongoDBRepository:
     async def get_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
         """Get workflow by ID"""
         try:
-            workflow = await self.workflows_collection.find_one({"workflow_id": workflow_id})
-            if workflow:
-                workflow["_id"] = str(workflow["_id"])
-            return workflow
+            return await self._cached_find_one("workflows", self.workflows_collection, workflow_id)
         except Exception as e:
             logger.error(f"Failed to get workflow {workflow_id}: {e}")
             return None
@@ -247,13 +257,26 @@ class MongoDBRepository:
                 {"workflow_id": workflow_id},
                 {"$set": update_data}
             )
+            self.invalidate_cached("workflows", [workflow_id])
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Failed to update workflow {workflow_id}: {e}")
             return False
     
-    async def list_workflows(self, owner_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List workflows with optional filters"""
+    async def delete_workflow(self, workflow_id: str) -> bool:
+        """Delete workflow"""
+        try:
+            result = await self.workflows_collection.delete_one({"workflow_id": workflow_id})
+            self.invalidate_cached("workflows", [workflow_id])
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Failed to delete workflow {workflow_id}: {e}")
+            return False
+    
+    async def list_workflows(self, owner_id: Optional[str] = None, status: Optional[str] = None,
+                             view: str = "summary", limit: int = DEFAULT_PAGE_SIZE,
+                             after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List workflows with optional filters, one keyset page at a time"""
         try:
             query = {}
             if owner_id:
@@ -261,13 +284,7 @@ class MongoDBRepository:
             if status:
                 query["status"] = status
             
-            cursor = self.workflows_collection.find(query)
-            workflows = await cursor.to_list(length=None)
-            
-            for workflow in workflows:
-                workflow["_id"] = str(workflow["_id"])
-            
-            return workflows
+            return await self._find_page(self.workflows_collection, "workflows", query, view, limit, after)
         except Exception as e:
             logger.error(f"Failed to list workflows: {e}")
             return []
@@ -290,10 +307,7 @@ class MongoDBRepository:
     async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task by ID"""
         try:
-            task = await self.tasks_collection.find_one({"task_id": task_id})
-            if task:
-                task["_id"] = str(task["_id"])
-            return task
+            return await self.tasks_collection.find_one({"task_id": task_id})
         except Exception as e:
             logger.error(f"Failed to get task {task_id}: {e}")
             return None
@@ -314,8 +328,11 @@ class MongoDBRepository:
                         workflow_id: Optional[str] = None,
                         agent_id: Optional[str] = None,
                         status: Optional[str] = None,
-                        owner_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List tasks with optional filters"""
+                        owner_id: Optional[str] = None,
+                        view: str = "summary",
+                        limit: int = DEFAULT_PAGE_SIZE,
+                        after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List tasks with optional filters, one keyset page at a time"""
         try:
             query = {}
             if workflow_id:
@@ -327,23 +344,120 @@ class MongoDBRepository:
             if owner_id:
                 query["owner_id"] = owner_id
             
-            cursor = self.tasks_collection.find(query)
-            tasks = await cursor.to_list(length=None)
-            
-            for task in tasks:
-                task["_id"] = str(task["_id"])
-            
-            return tasks
+            return await self._find_page(self.tasks_collection, "tasks", query, view, limit, after)
         except Exception as e:
             logger.error(f"Failed to list tasks: {e}")
             return []
     
+    # Bulk operations
+    async def bulk_create_agents(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many agents with one unordered insert_many"""
+        return await self._bulk_insert(self.agents_collection, AgentModel, items)
+
+    async def bulk_create_workflows(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many workflows with one unordered insert_many"""
+        return await self._bulk_insert(self.workflows_collection, WorkflowModel, items)
+
+    async def bulk_create_tasks(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many tasks with one unordered insert_many"""
+        return await self._bulk_insert(self.tasks_collection, TaskModel, items)
+
+    async def bulk_update_agents(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply many {"agent_id", "update"} items with one unordered bulk_write"""
+        return await self._bulk_update(self.agents_collection, "agent_id", updates, touch_updated_at=True)
+
+    async def bulk_update_workflows(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply many {"workflow_id", "update"} items with one unordered bulk_write"""
+        return await self._bulk_update(self.workflows_collection, "workflow_id", updates, touch_updated_at=True)
+
+    async def bulk_update_tasks(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply many {"task_id", "update"} items with one unordered bulk_write"""
+        return await self._bulk_update(self.tasks_collection, "task_id", updates)
+
+    async def _bulk_insert(self, collection, model_cls, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate each item, insert the valid ones unordered and report a result per item"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        docs: List[Dict[str, Any]] = []
+        positions: List[int] = []
+        for i, item in enumerate(items):
+            try:
+                docs.append(model_cls(**item).dict(by_alias=True))
+                positions.append(i)
+            except Exception as e:
+                results[i] = {"index": i, "success": False, "error": str(e)}
+
+        write_errors: Dict[int, str] = {}
+        if docs:
+            try:
+                await collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get("writeErrors", []):
+                    write_errors[err["index"]] = err.get("errmsg", "write error")
+            except Exception as e:
+                logger.error(f"Bulk insert into {collection.name} failed: {e}")
+                write_errors = {pos: str(e) for pos in range(len(docs))}
+
+        for pos, (i, doc) in enumerate(zip(positions, docs)):
+            if pos in write_errors:
+                results[i] = {"index": i, "success": False, "error": write_errors[pos]}
+            else:
+                results[i] = {"index": i, "success": True, "id": str(doc["_id"])}
+        created = sum(1 for r in results if r["success"])
+        logger.info(f"Bulk created {created}/{len(items)} documents in {collection.name}")
+        return {"created": created, "failed": len(items) - created, "results": results}
+
+    async def _bulk_update(self, collection, id_field: str, updates: List[Dict[str, Any]],
+                           touch_updated_at: bool = False) -> Dict[str, Any]:
+        """Turn {id_field, "update"} items into one unordered bulk_write of $set operations"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(updates)
+        ops: List[UpdateOne] = []
+        positions: List[int] = []
+        now = datetime.utcnow()
+        for i, item in enumerate(updates):
+            key = item.get(id_field)
+            fields = item.get("update")
+            if not key or not isinstance(fields, dict) or not fields:
+                results[i] = {"index": i, "success": False, "error": f"each item needs '{id_field}' and a non-empty 'update'"}
+                continue
+            fields = {**fields, "updated_at": now} if touch_updated_at else fields
+            ops.append(UpdateOne({id_field: key}, {"$set": fields}))
+            positions.append(i)
+
+        write_errors: Dict[int, str] = {}
+        matched = modified = 0
+        if ops:
+            try:
+                res = await collection.bulk_write(ops, ordered=False)
+                matched, modified = res.matched_count, res.modified_count
+            except BulkWriteError as e:
+                matched = e.details.get("nMatched", 0)
+                modified = e.details.get("nModified", 0)
+                for err in e.details.get("writeErrors", []):
+                    write_errors[err["index"]] = err.get("errmsg", "write error")
+            except Exception as e:
+                logger.error(f"Bulk update of {collection.name} failed: {e}")
+                write_errors = {pos: str(e) for pos in range(len(ops))}
+        self.invalidate_cached(collection.name, [updates[i][id_field] for i in positions])
+
+        for pos, i in enumerate(positions):
+            if pos in write_errors:
+                results[i] = {"index": i, "success": False, id_field: updates[i][id_field], "error": write_errors[pos]}
+            else:
+                results[i] = {"index": i, "success": True, id_field: updates[i][id_field]}
+        return {"matched": matched, "modified": modified,
+                "failed": sum(1 for r in results if not r["success"]), "results": results}
+
     # Session CRUD operations
     async def create_session(self, session_data: Dict[str, Any]):
         """Create a new session"""
         try:
             session = SessionModel(**session_data)
-            result = await self.sessions_collection.insert_one(session.dict(by_alias=True))
+            doc = session.dict(by_alias=True)
+            # messages go to bucket documents, never into the session document
+            initial_messages = doc.pop("messages", [])
+            result = await self.sessions_collection.insert_one(doc)
+            if initial_messages:
+                await self._insert_message_buckets(session_data.get("session_id") or str(doc["_id"]), initial_messages)
             logger.info(f"Created session: {session.session_type}")
             return result
         except DuplicateKeyError:
@@ -353,12 +467,12 @@ class MongoDBRepository:
             logger.error(f"Failed to create session: {e}")
             return None
     
-    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session by ID"""
+    async def get_session(self, session_id: str, include_messages: bool = False, message_limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Get session by ID; messages are only loaded when asked for (latest `message_limit`)"""
         try:
-            session = await self.sessions_collection.find_one({"session_id": session_id})
-            if session:
-                session["_id"] = str(session["_id"])
+            session = await self.sessions_collection.find_one({"session_id": session_id}, {"messages": 0})
+            if session and include_messages:
+                session["messages"] = await self.get_session_messages(session_id, limit=message_limit)
             return session
         except Exception as e:
             logger.error(f"Failed to get session {session_id}: {e}")
@@ -378,41 +492,110 @@ class MongoDBRepository:
             return False
     
     async def add_session_message(self, session_id: str, message: Dict[str, Any]) -> bool:
-        """Add message to session"""
+        """Append a message to the session's open bucket, opening bucket seq+1 once it is full"""
         try:
-            message["timestamp"] = datetime.utcnow()
+            now = datetime.utcnow()
+            message["timestamp"] = now
+            for _ in range(BUCKET_APPEND_ATTEMPTS):
+                result = await self.message_buckets_collection.update_one(
+                    {"session_id": session_id, "count": {"$lt": MESSAGE_BUCKET_SIZE}},
+                    {"$push": {"messages": message}, "$inc": {"count": 1}, "$set": {"last_ts": now}},
+                )
+                if result.matched_count:
+                    break
+                last = await self.message_buckets_collection.find_one(
+                    {"session_id": session_id, "seq": {"$exists": True}}, {"seq": 1}, sort=[("seq", -1)]
+                )
+                try:
+                    # (session_id, seq) is unique: of concurrent appenders only one opens the bucket
+                    await self.message_buckets_collection.insert_one({
+                        "session_id": session_id,
+                        "seq": (last.get("seq", -1) if last else -1) + 1,
+                        "count": 1,
+                        "messages": [message],
+                        "first_ts": now,
+                        "last_ts": now,
+                    })
+                    break
+                except DuplicateKeyError:
+                    continue  # another writer opened it first; push into that one
+            else:
+                raise RuntimeError(f"no open message bucket after {BUCKET_APPEND_ATTEMPTS} attempts")
             result = await self.sessions_collection.update_one(
                 {"session_id": session_id},
-                {
-                    "$push": {"messages": message},
-                    "$set": {"last_activity": datetime.utcnow()}
-                }
+                {"$set": {"last_activity": now}}
             )
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Failed to add message to session {session_id}: {e}")
             return False
 
-    def _convert_objectid(self, doc: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert ObjectId to string"""
-        if doc and "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-        return doc
+    async def _insert_message_buckets(self, session_id: str, messages: List[Dict[str, Any]]):
+        """Store a batch of messages as full buckets, numbered from seq 0"""
+        buckets = []
+        for seq, i in enumerate(range(0, len(messages), MESSAGE_BUCKET_SIZE)):
+            chunk = messages[i:i + MESSAGE_BUCKET_SIZE]
+            buckets.append({
+                "session_id": session_id,
+                "seq": seq,
+                "count": len(chunk),
+                "messages": chunk,
+                "first_ts": chunk[0].get("timestamp") or datetime.utcnow(),
+                "last_ts": chunk[-1].get("timestamp") or datetime.utcnow(),
+            })
+        await self.message_buckets_collection.insert_many(buckets)
+
+    async def get_session_messages(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages of a session in chronological order; with `limit`, only the latest N are read"""
+        try:
+            projection = {"_id": 0, "messages": {"$slice": -limit} if limit else 1}
+            cursor = self.message_buckets_collection.find({"session_id": session_id}, projection).sort("first_ts", -1)
+            messages: List[Dict[str, Any]] = []
+            async for bucket in cursor:
+                messages[:0] = bucket.get("messages", [])
+                if limit and len(messages) >= limit:
+                    return messages[-limit:]
+
+            # sessions written before bucketing keep their history embedded in the session document
+            remaining = limit - len(messages) if limit else None
+            legacy_projection = {"_id": 0, "messages": {"$slice": -remaining} if remaining else 1}
+            legacy = await self.sessions_collection.find_one({"session_id": session_id}, legacy_projection)
+            if legacy and legacy.get("messages"):
+                messages[:0] = legacy["messages"]
+            return messages[-limit:] if limit else messages
+        except Exception as e:
+            logger.error(f"Failed to get messages for session {session_id}: {e}")
+            return []
+
+    async def _find_page(self, collection, name: str, query: Dict[str, Any], view: str,
+                         limit: int, after: Optional[str]) -> List[Dict[str, Any]]:
+        """One page of documents newest-first by _id, starting after the `after` cursor"""
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        if after:
+            query = {**query, "_id": {"$lt": ObjectId(after) if ObjectId.is_valid(after) else after}}
+        projection = SUMMARY_EXCLUDES.get(name) if view != "full" else None
+        cursor = collection.find(query, projection).sort("_id", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @staticmethod
+    def next_cursor(items: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Cursor for the page after `items`, or None when this was the last page"""
+        if items and len(items) >= min(limit, MAX_PAGE_SIZE):
+            return str(items[-1]["_id"])
+        return None
 
-    async def get_workflows(self):
-        """Get all workflows"""
+    async def get_workflows(self, view: str = "summary", limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None):
+        """Get one page of workflows"""
         try:
-            workflows = await self.workflows_collection.find({}).to_list(length=None)
-            return [self._convert_objectid(workflow) for workflow in workflows]
+            return await self._find_page(self.workflows_collection, "workflows", {}, view, limit, after)
         except Exception as e:
             logger.error(f"Error getting workflows: {e}")
             return []
 
-    async def get_conversations(self):
-        """Get all conversations"""
+    async def get_conversations(self, view: str = "summary", limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None):
+        """Get one page of conversations, newest first"""
         try:
-            conversations = await self.sessions_collection.find({}).sort("created_at", -1).to_list(length=None)
-            return [self._convert_objectid(conversation) for conversation in conversations]
+            return await self._find_page(self.sessions_collection, "sessions", {}, view, limit, after)
         except Exception as e:
             logger.error(f"Error getting conversations: {e}")
             return []
@@ -420,8 +603,7 @@ class MongoDBRepository:
     async def get_recent_conversations(self, limit: int = 5):
         """Get recent conversations"""
         try:
-            conversations = await self.sessions_collection.find({}).sort("created_at", -1).limit(limit).to_list(length=None)
-            return [self._convert_objectid(conversation) for conversation in conversations]
+            return await self.sessions_collection.find({}, SUMMARY_EXCLUDES["sessions"]).sort("created_at", -1).limit(limit).to_list(length=limit)
         except Exception as e:
             logger.error(f"Error getting recent conversations: {e}")
             return []
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Benchmark
+Measures checks/sec for each rate limiter backend (memory, shm, mongo).
+
+Usage:
+    python scripts/bench_rate_limiter.py --backend all --checks 200000 --keys 1000
+    python scripts/bench_rate_limiter.py --backend mongo --checks 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from services.rate_limiter import RateLimiterBackend, create_rate_limiter
+
+
+async def run_backend(limiter: RateLimiterBackend, checks: int, keys: int, concurrency: int) -> float:
+    """Run `checks` limiter checks spread over `keys` keys; return checks/sec"""
+    key_names: List[str] = [f"bench_key_{i}" for i in range(keys)]
+    per_worker = checks // concurrency
+
+    async def worker(offset: int):
+        for i in range(per_worker):
+            await limiter.check(key_names[(offset + i) % keys], 6000, 100)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w * per_worker) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for name in key_names:
+        await limiter.reset(name)
+    return (per_worker * concurrency) / elapsed
+
+
+def build(backend: str) -> RateLimiterBackend:
+    if backend == "mongo":
+        from services.mongo_client import mongo_registry
+        db = mongo_registry.get_database()
+        return create_rate_limiter("mongo", collection=db["api_rate_limits_bench"])
+    if backend == "shm":
+        return create_rate_limiter("shm")
+    return create_rate_limiter("memory")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter backends")
+    parser.add_argument("--backend", default="all", choices=["all", "memory", "shm", "mongo"])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent checkers (matters for mongo)")
+    args = parser.parse_args()
+
+    backends = ["memory", "shm", "mongo"] if args.backend == "all" else [args.backend]
+    print(f"=== Rate limiter benchmark: {args.checks} checks over {args.keys} keys ===")
+    for backend in backends:
+        checks = args.checks
+        if backend == "mongo" and args.backend == "all":
+            checks = min(checks, 5000)  # network round-trips; keep the default run short
+        try:
+            limiter = build(backend)
+        except Exception as e:
+            print(f"{backend:>7}: skipped ({e})")
+            continue
+        try:
+            rate = await run_backend(limiter, checks, args.keys, max(1, args.concurrency))
+            print(f"{backend:>7}: {rate:,.0f} checks/sec")
+        except Exception as e:
+            print(f"{backend:>7}: failed ({e})")
+        finally:
+            await limiter.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+Compares FastAPI's default response path (jsonable_encoder + JSONResponse) with
+ORJSONResponse on session payloads shaped like repository documents.
+
+Usage:
+    python scripts/bench_serialization.py --sessions 10000 --messages 20 --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.responses import ORJSONResponse
+
+
+def make_sessions(count: int, messages: int) -> List[Dict[str, Any]]:
+    """Raw documents as Mongo returns them: ObjectId _id, datetimes, nested messages"""
+    start = datetime(2024, 1, 1)
+    sessions = []
+    for i in range(count):
+        created = start + timedelta(minutes=i)
+        sessions.append({
+            "_id": ObjectId(),
+            "session_id": f"session_{i}",
+            "agent_id": f"agent_{i % 50}",
+            "user_id": f"user_{i % 1000}",
+            "session_type": "voice" if i % 3 else "chat",
+            "status": "completed",
+            "start_time": created,
+            "end_time": created + timedelta(minutes=7),
+            "created_at": created,
+            "quality_score": 0.87,
+            "tags": ["demo", "benchmark"],
+            "messages": [
+                {
+                    "role": "user" if j % 2 == 0 else "agent",
+                    "content": f"message {j} of session {i}",
+                    "timestamp": created + timedelta(seconds=j * 5),
+                }
+                for j in range(messages)
+            ],
+        })
+    return sessions
+
+
+def default_path(payload: Any) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def orjson_path(payload: Any) -> bytes:
+    return ORJSONResponse(payload).body
+
+
+def bench(fn: Callable[[Any], bytes], payload: Any, rounds: int) -> float:
+    """Best-of-rounds seconds for one serialization of the payload"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=20, help="embedded messages per session")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = {"success": True, "sessions": make_sessions(args.sessions, args.messages)}
+    size_mb = len(orjson_path(payload)) / 1e6
+    print(f"=== Serialization benchmark: {args.sessions} sessions x {args.messages} messages ({size_mb:.1f} MB) ===")
+
+    results = {}
+    for name, fn in (("jsonable_encoder+json", default_path), ("orjson", orjson_path)):
+        seconds = bench(fn, payload, args.rounds)
+        results[name] = seconds
+        print(f"{name:>22}: {seconds * 1000:8.1f} ms  ({args.sessions / seconds:,.0f} sessions/sec, {size_mb / seconds:,.0f} MB/s)")
+    print(f"{'speedup':>22}: {results['jsonable_encoder+json'] / results['orjson']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
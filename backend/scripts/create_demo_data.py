@@ -162,13 +162,13 @@ async def create_demo_agents(repo: MongoDBRepository) -> List[str]:
     ]
     
     agent_ids = []
-    for agent_data in demo_agents:
-        result = await repo.create_agent(agent_data)
-        if result and result.inserted_id:
-            agent_ids.append(str(result.inserted_id))
+    result = await repo.bulk_create_agents(demo_agents)
+    for agent_data, item in zip(demo_agents, result["results"]):
+        if item["success"]:
+            agent_ids.append(item["id"])
             print(f"Created agent: {agent_data['name']}")
         else:
-            print(f"Failed to create agent: {agent_data['name']}")
+            print(f"Failed to create agent: {agent_data['name']} ({item['error']})")
     
     return agent_ids
 
@@ -389,13 +389,13 @@ async def create_demo_workflows(repo: MongoDBRepository, agent_ids: List[str]) -
     ]
     
     workflow_ids = []
-    for workflow_data in demo_workflows:
-        result = await repo.create_workflow(workflow_data)
-        if result and result.inserted_id:
-            workflow_ids.append(str(result.inserted_id))
+    result = await repo.bulk_create_workflows(demo_workflows)
+    for workflow_data, item in zip(demo_workflows, result["results"]):
+        if item["success"]:
+            workflow_ids.append(item["id"])
             print(f"Created workflow: {workflow_data['name']}")
         else:
-            print(f"Failed to create workflow: {workflow_data['name']}")
+            print(f"Failed to create workflow: {workflow_data['name']} ({item['error']})")
     
     return workflow_ids
 
@@ -575,13 +575,13 @@ async def create_demo_tasks(repo: MongoDBRepository, workflow_ids: List[str]) ->
     ]
     
     task_ids = []
-    for task_data in demo_tasks:
-        result = await repo.create_task(task_data)
-        if result and result.inserted_id:
-            task_ids.append(str(result.inserted_id))
+    result = await repo.bulk_create_tasks(demo_tasks)
+    for task_data, item in zip(demo_tasks, result["results"]):
+        if item["success"]:
+            task_ids.append(item["id"])
             print(f"Created task: {task_data['title']}")
         else:
-            print(f"Failed to create task: {task_data['title']}")
+            print(f"Failed to create task: {task_data['title']} ({item['error']})")
     
     return task_ids
 
@@ -670,9 +670,6 @@ async def main():
         # Connect to MongoDB
         await repo.connect()
         
-        # Create indexes
-        await repo.create_indexes()
-        
         # Create demo data
         agent_ids = await create_demo_agents(repo)
         workflow_ids = await create_demo_workflows(repo, agent_ids)
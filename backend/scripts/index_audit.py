@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Index Audit
+Applies the declarative index specs and explains every known query shape.
+
+Usage:
+    python scripts/index_audit.py diff                  # report only, change nothing
+    python scripts/index_audit.py apply [--rebuild-conflicts] [--drop-unmanaged]
+    python scripts/index_audit.py explain               # exit code 1 if any COLLSCAN
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the backend directory to the Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from repositories.indexes import REPOSITORY_INDEXES
+from repositories.mongodb_repository import MongoDBRepository
+from services.mongo_client import mongo_registry
+from services.session_service import SESSION_INDEXES, SessionService
+
+
+def print_report(title: str, report) -> None:
+    print(f"=== {title} ===")
+    for coll, entry in report.items():
+        parts = [f"{k}={v}" for k, v in entry.items() if v]
+        print(f"  {coll}: {', '.join(parts) or 'no indexes'}")
+
+
+async def diff(db, specs):
+    """Report against the spec without creating anything"""
+    report = {}
+    for coll, wanted in specs.items():
+        existing = await db[coll].index_information()
+        names = {spec.index_name for spec in wanted}
+        missing = [s.index_name for s in wanted
+                   if not any(s.same_keys(info) and s.same_options(info) for info in existing.values())]
+        report[coll] = {
+            "missing": missing,
+            "unmanaged": [n for n, info in existing.items()
+                          if n != "_id_" and n not in names and not any(s.same_keys(info) for s in wanted)],
+        }
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Apply and audit MongoDB indexes")
+    parser.add_argument("command", choices=["diff", "apply", "explain"])
+    parser.add_argument("--rebuild-conflicts", action="store_true", help="drop and recreate indexes that differ from spec")
+    parser.add_argument("--drop-unmanaged", action="store_true", help="drop indexes that are not in any spec")
+    args = parser.parse_args()
+
+    repo = MongoDBRepository()
+    # connect() applies the repository spec itself, so only bind the handles for diff/explain
+    repo.db = MongoDBRepository.default_database()
+    sessions = SessionService(mongo_registry.get_database())
+    try:
+        if args.command == "diff":
+            print_report("repository", await diff(repo.db, REPOSITORY_INDEXES))
+            print_report("session service", await diff(sessions.db, SESSION_INDEXES))
+        elif args.command == "apply":
+            print_report("repository", await repo.ensure_indexes(args.drop_unmanaged, args.rebuild_conflicts))
+            print_report("session service", await sessions.ensure_indexes(args.drop_unmanaged, args.rebuild_conflicts))
+        else:
+            findings = await repo.explain_audit() + await sessions.explain_audit()
+            scans = 0
+            for f in findings:
+                if "error" in f:
+                    print(f"  ERROR    {f['collection']}: {f['query']} ({f['error']})")
+                    continue
+                flag = "COLLSCAN" if f["collscan"] else ("SORT" if f["in_memory_sort"] else "ok")
+                scans += f["collscan"]
+                print(f"  {flag:<8} {f['collection']}: {f['query']} -> {' > '.join(f['stages'])}")
+            print(f"{len(findings)} query shapes, {scans} collection scans")
+            if scans:
+                sys.exit(1)
+    finally:
+        await mongo_registry.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Import-time Profile
+Imports server.py in a fresh interpreter with `-X importtime` and reports the
+modules that cost the most, grouped by top-level package.
+
+Usage:
+    python scripts/profile_imports.py --top 25
+    python scripts/profile_imports.py --module services.voice_service
+    python scripts/profile_imports.py --target-ms 1500   # exit 1 if the import exceeds the target
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """Import `module` in a subprocess; return wall ms and (name, self_us, cumulative_us, depth) rows"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise SystemExit(f"import {module} failed:\n{tail}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return wall_ms, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost of the backend")
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=float(os.environ.get("STARTUP_IMPORT_TARGET_MS", "0")),
+                        help="fail when the total import time exceeds this (0 disables)")
+    args = parser.parse_args()
+
+    wall_ms, rows = profile(args.module)
+    total_us = next((cum for name, _, cum, _ in rows if name == args.module), sum(r[1] for r in rows))
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"=== import {args.module}: {total_us / 1000:.0f} ms in imports, {wall_ms:.0f} ms wall (incl. interpreter start) ===")
+    print(f"\nTop {args.top} packages by self time:")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {pkg}")
+    print(f"\nTop {args.top} modules by cumulative time:")
+    for name, _, cum, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cum / 1000:8.1f} ms  {name}{'' if depth else '  (top level)'}")
+
+    if args.target_ms:
+        over = total_us / 1000 > args.target_ms
+        print(f"\nTarget {args.target_ms:.0f} ms: {'EXCEEDED' if over else 'ok'}")
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
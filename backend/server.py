@@ -3,10 +3,16 @@ AImpact Platform - Universal Agent Platform Backend
 Enterprise Voice Agent Ecosystem that democratizes AI voice agent development
 """
 
-from fastapi import FastAPI, Depends
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 import logging
 
@@ -31,11 +37,105 @@ from api.sessions import router as sessions_router
 from middleware.auth import require_api_key
 from api.uam import router as uam_router
 from repositories.mongodb_repository import mongodb_repository
+from services.access_service import access_service
+from services.session_service import session_service
+from services.agent_service import agent_service
+from services.rollup_service import rollup_service
+from services.agent_repository import agent_repository
+from services.mongo_client import mongo_registry
+from services.health_service import health_service
+from services.warmup_service import warmup_service
+from services.ai_service import ai_service
+from services.voice_service import voice_service
+from services.livekit_service import livekit_service
+from services.payment_service import payment_service
+from services.universal_agent_service import universal_agent_service
+from api.responses import ORJSONResponse, orjson_response
+
+# time from importing this module until startup completes; provider SDKs load lazily to keep it low
+STARTUP_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "3000"))
+logger.info(f"Backend modules imported in {(time.perf_counter() - _import_started) * 1000:.0f} ms "
+            "(per-module report: python scripts/profile_imports.py)")
+
+# Database connection
+client = None
+db = None
+
+def _bind_database():
+    """Open the shared client (MONGO_URL/DB_NAME) and hand its database to the Mongo-backed services"""
+    global client, db
+    client = mongo_registry.get_client()
+    db = mongo_registry.get_database()
+    for service in (access_service, session_service, rollup_service, ai_service.active_chats, agent_repository):
+        service.init(db)
+
+async def _warm_database():
+    """Repository connection and indexes first, then index builds, cache preload and seeding in parallel"""
+    if not await warmup_service.timed("repository", mongodb_repository.connect):
+        raise RuntimeError("repository connection failed")
+
+    async def rollups():
+        await rollup_service.ensure_indexes()
+        await rollup_service.seed_totals(session_service.sessions, session_service.messages)
+
+    await asyncio.gather(
+        # indexes backing session listing and transcript export
+        warmup_service.timed("session_indexes", session_service.ensure_indexes),
+        warmup_service.timed("rollups", rollups),
+        warmup_service.timed("ai_session_indexes", ai_service.active_chats.ensure_indexes),
+        warmup_service.timed("agent_cache", lambda: mongodb_repository.preload_cache("agents", {"status": "active"})),
+    )
+
+async def _load_templates():
+    return len(agent_service.get_agent_templates()) + len(await universal_agent_service.get_agent_templates())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up everything before taking traffic; /ready reports 503 until this finishes"""
+    global client, db
+    _bind_database()
+    health_service.start()
+    connect = os.getenv("WARMUP_PROVIDER_CONNECTIONS", "true").lower() in ("1", "true", "yes")
+    await warmup_service.run({
+        "mongodb_pool": mongo_registry.warm_pool,
+        "database": _warm_database,
+        "openai": lambda: ai_service.warm_up(connect=connect),
+        "voice": lambda: voice_service.warm_up(connect=connect),
+        "livekit": livekit_service.warm_up,
+        "stripe": payment_service.warm_up,
+        "templates": _load_templates,
+    })
+    health_service.started_up = True
+    ready_ms = (time.perf_counter() - _import_started) * 1000
+    if ready_ms > STARTUP_TARGET_MS:
+        logger.warning(f"Startup took {ready_ms:.0f} ms, above the {STARTUP_TARGET_MS:.0f} ms target")
+    else:
+        logger.info(f"Startup finished {ready_ms:.0f} ms after import began")
+
+    yield
+
+    await health_service.close()
+    await agent_service.close()
+    # Flush write-behind usage counters and transcripts before the connections go away
+    await access_service.close()
+    await session_service.close()
+    await rollup_service.close()
+    await ai_service.close()
+
+    # Disconnect mongodb_repository
+    await mongodb_repository.disconnect()
+
+    await mongo_registry.close()
+    client = None
+    db = None
+    logger.info("MongoDB connection closed")
 
 app = FastAPI(
     title="AImpact Platform API",
     description="Universal Agent Platform - Enterprise Voice Agent Ecosystem",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS configuration
@@ -47,42 +147,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database connection
-client = None
-db = None
-
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database connection on startup"""
-    global client, db
-    try:
-        mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-        db_name = os.getenv("DB_NAME", "aiimpact_platform")
-        
-        client = AsyncIOMotorClient(mongo_url)
-        db = client[db_name]
-        
-        # Initialize mongodb_repository
-        await mongodb_repository.connect()
-        
-        # Test connection
-        await client.admin.command("ping")
-        logger.info(f"Connected to MongoDB: {db_name}")
-        
-    except Exception as e:
-        logger.error(f"Failed to connect to MongoDB: {e}")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection on shutdown"""
-    global client
-    if client:
-        client.close()
-        logger.info("MongoDB connection closed")
-    
-    # Disconnect mongodb_repository
-    await mongodb_repository.disconnect()
-
 # Include API routers with API key dependency (soft-enforced if keys exist)
 app.include_router(access_router)  # allow bootstrap without key
 app.include_router(analytics_router, dependencies=[Depends(require_api_key)])
@@ -117,128 +181,101 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        # Check database connection
-        if client:
-            await client.admin.command("ping")
-            db_status = "healthy"
-        else:
-            db_status = "disconnected"
-        
-        # Check service availability
-        services_status = {
-            "database": db_status,
-            "ai_service": "active",
-            "voice_service": "active",
-            "livekit_service": "active"
-        }
-        
-        return {
-            "status": "healthy",
-            "services": services_status,
-            "message": "All systems operational"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e),
-            "message": "System check failed"
-        }
+    """Latest background probe results; never touches the dependencies itself"""
+    return health_service.snapshot()
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """200 once warm-up finished and critical dependencies are up, 503 before that"""
+    readiness = health_service.readiness()
+    readiness["warmup"] = warmup_service.report()
+    if not readiness["ready"]:
+        response.status_code = 503
+    return readiness
+
+@app.get("/health/db-pool")
+async def db_pool_stats():
+    """Shared Mongo pool configuration and checkout wait-time metrics"""
+    return mongo_registry.pool_stats()
 
 @app.get("/api/conversations")
-async def get_conversations():
+async def get_conversations(
+    response: Response,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = None,
+):
+    """One page of conversations, newest first; the next page cursor is in X-Next-Cursor"""
     try:
-        conversations = await mongodb_repository.get_conversations()
-        return conversations
+        conversations = await mongodb_repository.get_conversations(view=view, limit=limit, after=after)
+        next_cursor = mongodb_repository.next_cursor(conversations, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return orjson_response(conversations, response)
     except Exception as e:
         return {"error": str(e)}
 
+async def _agent_name(agent_id: str) -> str:
+    agent = agent_service.get_agent(agent_id) or await mongodb_repository.get_agent(agent_id)
+    return (agent or {}).get("name") or agent_id
+
 @app.get("/api/analytics")
 async def get_analytics(range: str = "7d"):
     try:
-        from datetime import datetime, timedelta
-        import random
-        
-        now = datetime.now()
         days = 30 if range == '30d' else 7 if range == '7d' else 1
         
+        # Current and previous period from the day rollups: 2 * days documents by _id
+        buckets = await rollup_service.day_buckets(2 * days)
+        previous, current = buckets[:days], buckets[days:]
+        summary = rollup_service.summarize(current)
+        total = summary["total"]
+        rates = rollup_service.rates(total)
+        previous_conversations = sum(b.get("conversations", 0) for b in previous)
+        
         # Overview metrics
         overview = {
-            'totalConversations': random.randint(10000, 15000),
-            'activeUsers': random.randint(3000, 4000),
-            'avgResponseTime': round(random.uniform(0.8, 1.5), 1),
-            'successRate': round(random.uniform(92, 98), 1),
-            'totalRevenue': random.randint(40000, 50000),
-            'growthRate': round(random.uniform(15, 30), 1)
+            'totalConversations': total["conversations"],
+            'activeUsers': round(sum(b["active_users"] for b in current) / days),
+            'avgResponseTime': rates["avgResponseTime"] or 0,
+            'successRate': rates["successRate"] or 0,
+            'cacheHitRate': rates["cacheHitRate"],
+            'totalRevenue': 0,  # no billing data is recorded yet
+            'growthRate': round(100 * (total["conversations"] - previous_conversations) / previous_conversations, 1)
+            if previous_conversations else 0,
         }
         
         # Conversation trends
-        conversation_trends = []
-        for i in range(days):
-            date = now - timedelta(days=days-1-i)
-            conversation_trends.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'conversations': random.randint(200, 600),
-                'users': random.randint(50, 200)
-            })
-        
-        # Agent performance
-        agent_performance = [
-            {
-                'name': 'Customer Support Bot',
-                'conversations': random.randint(3000, 4000),
-                'successRate': round(random.uniform(94, 98), 1),
-                'avgResponseTime': round(random.uniform(0.7, 1.0), 1)
-            },
-            {
-                'name': 'Sales Assistant',
-                'conversations': random.randint(2500, 3500),
-                'successRate': round(random.uniform(92, 96), 1),
-                'avgResponseTime': round(random.uniform(1.0, 1.3), 1)
-            },
-            {
-                'name': 'Technical Helper',
-                'conversations': random.randint(2000, 3000),
-                'successRate': round(random.uniform(90, 95), 1),
-                'avgResponseTime': round(random.uniform(1.2, 1.8), 1)
-            },
-            {
-                'name': 'Product Advisor',
-                'conversations': random.randint(1800, 2500),
-                'successRate': round(random.uniform(93, 97), 1),
-                'avgResponseTime': round(random.uniform(0.9, 1.2), 1)
-            },
-            {
-                'name': 'Booking Agent',
-                'conversations': random.randint(1500, 2200),
-                'successRate': round(random.uniform(95, 99), 1),
-                'avgResponseTime': round(random.uniform(0.8, 1.1), 1)
-            }
+        conversation_trends = [
+            {'date': b["_id"][len("day:"):], 'conversations': b["conversations"], 'users': b["active_users"]}
+            for b in current
         ]
         
-        # User engagement by hour
-        user_engagement = []
-        for hour in range(24):
-            user_engagement.append({
-                'hour': f'{hour:02d}:00',
-                'active': random.randint(50, 250)
+        # Agent performance
+        top_agents = sorted(summary["agents"].items(), key=lambda kv: kv[1].get("conversations", 0), reverse=True)[:5]
+        agent_performance = []
+        for agent_id, stats in top_agents:
+            agent_rates = rollup_service.rates(stats)
+            agent_performance.append({
+                'name': await _agent_name(agent_id),
+                'conversations': stats.get("conversations", 0),
+                'successRate': agent_rates["successRate"] or 0,
+                'avgResponseTime': agent_rates["avgResponseTime"] or 0,
+                'cacheHitRate': agent_rates["cacheHitRate"],
             })
         
-        # Revenue breakdown
-        revenue_breakdown = [
-            {'category': 'Subscriptions', 'value': 25000, 'color': '#0088FE'},
-            {'category': 'API Usage', 'value': 12000, 'color': '#00C49F'},
-            {'category': 'Premium Features', 'value': 6000, 'color': '#FFBB28'},
-            {'category': 'Consulting', 'value': 2670, 'color': '#FF8042'}
-        ]
+        # User engagement by hour of day over the last 24 hours
+        hours = await rollup_service.hour_buckets(24)
+        user_engagement = sorted(
+            ({'hour': f'{b["_id"][-2:]}:00', 'active': b["active_users"]} for b in hours),
+            key=lambda h: h['hour'],
+        )
         
         analytics_data = {
             'overview': overview,
             'conversationTrends': conversation_trends,
             'agentPerformance': agent_performance,
             'userEngagement': user_engagement,
-            'revenueBreakdown': revenue_breakdown
+            'revenueBreakdown': []
         }
         
         return analytics_data
@@ -246,7 +283,7 @@ async def get_analytics(range: str = "7d"):
         return {"error": str(e)}
 
 @app.get("/api/dashboard")
-async def get_dashboard_data():
+async def get_dashboard_data(response: Response):
     try:
         # Get agents count
         agents_count = await mongodb_repository.count_agents()
@@ -254,38 +291,36 @@ async def get_dashboard_data():
         # Get recent conversations
         recent_conversations = await mongodb_repository.get_recent_conversations(limit=5)
         
-        # Generate dashboard metrics
-        import random
+        # Rollups: all-time totals plus the last 7 day buckets
+        totals = await rollup_service.totals()
+        week = await rollup_service.day_buckets(7)
+        today = week[-1]
+        week_agents = rollup_service.summarize(week)["agents"]
+        top_agents = sorted(week_agents.items(), key=lambda kv: kv[1].get("responses", 0), reverse=True)[:4]
+        
         dashboard_data = {
             'metrics': {
                 'totalAgents': agents_count,
-                'activeAgents': max(1, agents_count - random.randint(0, 2)),
-                'totalConversations': random.randint(8000, 12000),
-                'revenue': random.randint(35000, 45000),
-                'successRate': round(random.uniform(92, 98), 1),
-                'activeUsers': random.randint(2500, 3500)
+                'activeAgents': len(rollup_service.summarize([today])["agents"]),
+                'totalConversations': totals["conversations"],
+                'revenue': 0,  # no billing data is recorded yet
+                'successRate': rollup_service.rates(totals)["successRate"] or 0,
+                'activeUsers': today["active_users"]
             },
             'recentConversations': recent_conversations,
             'chartData': {
                 'conversationVolume': [
-                    {'name': 'Mon', 'conversations': random.randint(400, 600)},
-                    {'name': 'Tue', 'conversations': random.randint(400, 600)},
-                    {'name': 'Wed', 'conversations': random.randint(400, 600)},
-                    {'name': 'Thu', 'conversations': random.randint(400, 600)},
-                    {'name': 'Fri', 'conversations': random.randint(400, 600)},
-                    {'name': 'Sat', 'conversations': random.randint(200, 400)},
-                    {'name': 'Sun', 'conversations': random.randint(200, 400)}
+                    {'name': datetime.strptime(b["_id"][len("day:"):], "%Y-%m-%d").strftime("%a"), 'conversations': b["conversations"]}
+                    for b in week
                 ],
                 'agentPerformance': [
-                    {'name': 'Support', 'performance': random.randint(85, 98)},
-                    {'name': 'Sales', 'performance': random.randint(85, 98)},
-                    {'name': 'Technical', 'performance': random.randint(85, 98)},
-                    {'name': 'Product', 'performance': random.randint(85, 98)}
+                    {'name': await _agent_name(agent_id), 'performance': rollup_service.rates(stats)["successRate"] or 0}
+                    for agent_id, stats in top_agents
                 ]
             }
         }
         
-        return dashboard_data
+        return orjson_response(dashboard_data, response)
     except Exception as e:
         return {"error": str(e)}
 
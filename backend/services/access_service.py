@@ -1,8 +1,9 @@
 """
 Access Service: API key management and rate limiting for Universal Agent Platform
 - Creates and verifies API keys
-- Enforces per-key rate limits (token bucket in-memory)
-- Stores keys and usage in MongoDB (UUID string IDs, no ObjectID)
+- Enforces per-key rate limits (GCRA, O(1) state per key)
+- Stores keys and usage in MongoDB (UUID string IDs, no ObjectID); usage is written behind in batches
+- Caches verified key documents and the enforcement flag in-process (TTL + LRU)
 """
 import os
 import time
@@ -11,18 +12,41 @@ import hashlib
 import secrets
 from typing import Optional, Dict, Any
 from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
+
+from .cache import TTLCache
+from .rate_limiter import RateLimitResult, create_rate_limiter
+from .usage_recorder import UsageRecorder
+
+_NOT_CACHED = object()
 
 class AccessService:
-    def __init__(self):
-        mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-        db_name = os.environ.get("DB_NAME", "aiimpact_platform")
-        self.client = AsyncIOMotorClient(mongo_url)
-        self.db = self.client[db_name]
-        self.keys = self.db["api_keys"]
-        self.usage = self.db["api_usage"]
-        # in-memory rate limiting state: key_id -> [timestamps]
-        self._rate_window: Dict[str, list[float]] = {}
+    def __init__(self, db=None):
+        self.db = None
+        self.keys = None
+        self.usage = None
+        self.usage_recorder: Optional[UsageRecorder] = None
+        self.rate_limiter = None
+        # verified key documents by sha256 hash; None marks a known-bad key.
+        # Create/delete invalidate locally; other workers converge within the TTL.
+        self._key_cache = TTLCache(
+            maxsize=int(os.environ.get("API_KEY_CACHE_SIZE", "1024")),
+            ttl=float(os.environ.get("API_KEY_CACHE_TTL", "30")),
+        )
+        self._negative_ttl = float(os.environ.get("API_KEY_NEGATIVE_CACHE_TTL", "5"))
+        self._enforced_ttl = float(os.environ.get("API_KEY_ENFORCED_CACHE_TTL", "30"))
+        self._enforced: Optional[bool] = None
+        self._enforced_expires_at = 0.0
+        if db is not None:
+            self.init(db)
+
+    def init(self, db) -> None:
+        """Bind the key, usage and rate-limit collections; called from the app lifespan"""
+        self.db = db
+        self.keys = db["api_keys"]
+        self.usage = db["api_usage"]
+        self.usage_recorder = UsageRecorder(self.keys, self.usage)
+        # RATE_LIMIT_BACKEND selects memory (default), shm (all workers on a host) or mongo (all nodes)
+        self.rate_limiter = create_rate_limiter(collection=db["api_rate_limits"])
 
     @staticmethod
     def _hash_key(key: str) -> str:
@@ -35,7 +59,7 @@ class AccessService:
     def _new_plain_key(self) -> str:
         return f"uap_{secrets.token_urlsafe(24)}"
 
-    async def create_api_key(self, name: str, rate_limit_per_minute: int = 60) -> Dict[str, Any]:
+    async def create_api_key(self, name: str, rate_limit_per_minute: int = 60, rate_limit_burst: Optional[int] = None) -> Dict[str, Any]:
         key_id = str(uuid.uuid4())
         plain = self._new_plain_key()
         key_hash = self._hash_key(plain)
@@ -46,13 +70,18 @@ class AccessService:
             "created_at": self._now_iso(),
             "active": True,
             "rate_limit_per_minute": int(rate_limit_per_minute),
+            # burst defaults to a full minute of requests, matching the old sliding window
+            "rate_limit_burst": int(rate_limit_burst or rate_limit_per_minute),
             "usage_total": 0,
             "last_used_at": None,
         }
         await self.keys.insert_one(doc)
+        # drop any negative entry for this hash and switch enforcement on right away
+        self._key_cache.pop(key_hash)
+        self._set_enforced(True)
         # return plaintext once
         masked = plain[:8] + "..." + plain[-4:]
-        return {"api_key": plain, "masked": masked, "key_id": key_id, "rate_limit_per_minute": rate_limit_per_minute}
+        return {"api_key": plain, "masked": masked, "key_id": key_id, "rate_limit_per_minute": rate_limit_per_minute, "rate_limit_burst": doc["rate_limit_burst"]}
 
     async def list_api_keys(self) -> list[Dict[str, Any]]:
         cursor = self.keys.find({})
@@ -64,15 +93,21 @@ class AccessService:
                 "active": doc.get("active", True),
                 "created_at": doc.get("created_at"),
                 "rate_limit_per_minute": doc.get("rate_limit_per_minute", 60),
+                "rate_limit_burst": doc.get("rate_limit_burst", doc.get("rate_limit_per_minute", 60)),
                 "usage_total": doc.get("usage_total", 0),
                 "last_used_at": doc.get("last_used_at")
             })
         return out
 
     async def delete_api_key(self, key_id: str) -> bool:
-        res = await self.keys.delete_one({"_id": key_id})
-        self._rate_window.pop(key_id, None)
-        return res.deleted_count == 1
+        doc = await self.keys.find_one_and_delete({"_id": key_id})
+        await self.rate_limiter.reset(key_id)
+        if not doc:
+            return False
+        self._key_cache.pop(doc.get("key_hash"))
+        # the last key may just have been removed; recount on the next check
+        self._enforced = None
+        return True
 
     async def _get_key_doc(self, key_id: str) -> Optional[Dict[str, Any]]:
         return await self.keys.find_one({"_id": key_id})
@@ -81,40 +116,46 @@ class AccessService:
         if not provided:
             return None
         key_hash = self._hash_key(provided)
+        cached = self._key_cache.get(key_hash, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            return cached
         doc = await self.keys.find_one({"key_hash": key_hash, "active": True})
+        if doc:
+            self._key_cache.set(key_hash, doc)
+        else:
+            self._key_cache.set(key_hash, None, ttl=self._negative_ttl)
         return doc
 
     async def is_enforced(self) -> bool:
         # If any key exists, enforce API key requirement
+        if self._enforced is not None and time.monotonic() < self._enforced_expires_at:
+            return self._enforced
         count = await self.keys.estimated_document_count()
-        return count > 0
-
-    async def rate_limit_check(self, key_id: str, limit_per_minute: int) -> bool:
-        now = time.time()
-        window = self._rate_window.setdefault(key_id, [])
-        cutoff = now - 60.0
-        # drop old timestamps
-        i = 0
-        for ts in window:
-            if ts > cutoff:
-                break
-            i += 1
-        if i:
-            del window[:i]
-        if len(window) >= limit_per_minute:
-            return False
-        window.append(now)
-        return True
+        self._set_enforced(count > 0)
+        return self._enforced
 
-    async def record_usage(self, key_doc: Dict[str, Any], endpoint: str):
-        key_id = key_doc["_id"]
-        await self.keys.update_one({"_id": key_id}, {"$inc": {"usage_total": 1}, "$set": {"last_used_at": self._now_iso()}})
-        # usage by day
-        day = datetime.utcnow().strftime("%Y-%m-%d")
-        await self.usage.update_one(
-            {"_id": f"{key_id}:{day}", "key_id": key_id, "day": day},
-            {"$inc": {"count": 1}, "$setOnInsert": {"created_at": self._now_iso()}, "$set": {"last_endpoint": endpoint}},
-            upsert=True
-        )
+    def _set_enforced(self, value: bool) -> None:
+        self._enforced = value
+        self._enforced_expires_at = time.monotonic() + self._enforced_ttl
+
+    def invalidate_cache(self) -> None:
+        """Drop all cached key documents and the enforcement flag"""
+        self._key_cache.clear()
+        self._enforced = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._key_cache.stats()
+
+    async def rate_limit_check(self, key_id: str, limit_per_minute: int, burst: Optional[int] = None) -> RateLimitResult:
+        return await self.rate_limiter.check(key_id, limit_per_minute, burst)
+
+    def record_usage(self, key_doc: Dict[str, Any], endpoint: str) -> None:
+        """Count one request; persisted by the usage recorder's next flush"""
+        self.usage_recorder.record(key_doc["_id"], endpoint)
+
+    async def close(self) -> None:
+        """Flush pending usage and release limiter resources"""
+        await self.usage_recorder.close()
+        await self.rate_limiter.close()
 
 access_service = AccessService()
\ No newline at end of file
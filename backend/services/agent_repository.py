@@ -1,17 +1,18 @@
 """
 Agent Repository: MongoDB persistence for agents (UUID/string IDs only)
 """
-import os
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
 
 class AgentRepository:
-    def __init__(self):
-        mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-        db_name = os.environ.get("DB_NAME", "aiimpact_platform")
-        self.client = AsyncIOMotorClient(mongo_url)
-        self.db = self.client[db_name]
-        self.col = self.db["agents"]
+    def __init__(self, db=None):
+        self.db = None
+        self.col = None
+        if db is not None:
+            self.init(db)
+
+    def init(self, db) -> None:
+        self.db = db
+        self.col = db["agents"]
 
     async def upsert_agent(self, agent_doc: Dict[str, Any]) -> None:
         _id = agent_doc.get("agent_id") or agent_doc.get("_id")
@@ -3,15 +3,18 @@ Agent Service for Universal Agent Platform
 Manages voice agents, their lifecycle, and configurations
 """
 import asyncio
+import time
 import uuid
 import logging
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 
 from .ai_service import ai_service
 from .voice_service import voice_service
 from .livekit_service import livekit_service
 from .session_service import session_service
+from .rollup_service import rollup_service
+from .response_cache import response_cache
 from repositories.mongodb_repository import mongodb_repository
 
 logger = logging.getLogger(__name__)
@@ -56,6 +59,8 @@ class AgentService:
     
     def __init__(self):
         self.active_agents: Dict[str, VoiceAgent] = {}
+        # streamed turns run detached from the response; keep references until they finish
+        self._turn_tasks: Set[asyncio.Task] = set()
         self.agent_templates = {
             "customer_service": {
                 "name": "Customer Service Agent",
@@ -116,7 +121,10 @@ class AgentService:
             ai_session_id = await ai_service.create_agent_chat(
                 agent_id=agent_id,
                 agent_type=agent_type,
-                model=template.get("llm_model", "gpt-4o")
+                model=template.get("llm_model", "gpt-4o"),
+                # top-level or in the advanced_config layout /api/studio/templates/advanced shows
+                history_limit=template.get("conversation_history_limit")
+                or (template.get("advanced_config") or {}).get("conversation_flow", {}).get("conversation_history_limit")
             )
             agent = VoiceAgent(
                 agent_id=agent_id,
@@ -177,48 +185,160 @@ class AgentService:
             sess_id = await session_service.ensure_session(session_id=session_id, agent_id=agent_id, user_id=user_id)
             await session_service.add_message(sess_id, role="user", content={"text": message})
 
-            # AI response
-            ai_response = await ai_service.send_message(session_id=agent.ai_session_id, message=message)
+            # AI response, or a cached one for agents that opted in
+            started = time.perf_counter()
+            cache_key, cached = await self._cached_reply(agent, message)
+            if cached:
+                ai_response = cached["text"]
+                await ai_service.record_exchange(agent.ai_session_id, message, ai_response)
+                ai_ok = True
+            else:
+                ai_response = await ai_service.send_message(session_id=agent.ai_session_id, message=message)
+                # ai_service reports provider failures as text rather than raising
+                ai_ok = bool(ai_response) and not ai_response.startswith(("Error:", "AI service not available"))
+            response_ms = (time.perf_counter() - started) * 1000
 
-            # TTS generation (may result in None)
-            voice_profile = agent.config.get("voice_profile", "professional_female")
-            audio_base64: Optional[str] = None
-            audio_generated = False
-            provider_used: Optional[str] = None
+            return await self._complete_turn(agent, sess_id, user_id, ai_response, response_ms, ai_ok,
+                                             cache_key=cache_key, cached=cached)
+        except Exception as e:
+            logger.error(f"Failed to process message for agent {agent_id}: {e}")
+            rollup_service.record_response(agent_id, user_id, 0, success=False)
+            raise
+
+    async def stream_user_message(self, agent_id: str, message: str, user_id: Optional[str] = None,
+                                  session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Process user message like process_user_message, yielding events while the reply is generated.
+
+        Events: "start" (session), "delta" (text chunks), then "done" with the same payload
+        process_user_message returns, or "error". The turn runs in its own task, so a client
+        that disconnects mid-stream does not stop the reply from being completed and logged.
+        """
+        if agent_id not in self.active_agents:
+            raise ValueError(f"Agent {agent_id} not found")
+        events: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self._streamed_turn(self.active_agents[agent_id], message, user_id, session_id, events))
+        self._turn_tasks.add(task)
+        task.add_done_callback(self._turn_tasks.discard)
+        while True:
+            event = await events.get()
+            yield event
+            if event["event"] in ("done", "error"):
+                return
+
+    async def _streamed_turn(self, agent: VoiceAgent, message: str, user_id: Optional[str],
+                             session_id: Optional[str], events: asyncio.Queue) -> None:
+        try:
+            sess_id = await session_service.ensure_session(session_id=session_id, agent_id=agent.agent_id, user_id=user_id)
+            await session_service.add_message(sess_id, role="user", content={"text": message})
+            events.put_nowait({"event": "start", "session_id": sess_id, "agent_id": agent.agent_id, "agent_name": agent.name})
+
+            started = time.perf_counter()
+            first_token_ms: Optional[float] = None
+            parts: List[str] = []
+            ai_ok = True
+            cache_key, cached = await self._cached_reply(agent, message)
+            if cached:
+                await ai_service.record_exchange(agent.ai_session_id, message, cached["text"])
+                first_token_ms = (time.perf_counter() - started) * 1000
+                parts.append(cached["text"])
+                events.put_nowait({"event": "delta", "text": cached["text"]})
+            else:
+                try:
+                    async for delta in ai_service.stream_message(session_id=agent.ai_session_id, message=message):
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - started) * 1000
+                        parts.append(delta)
+                        events.put_nowait({"event": "delta", "text": delta})
+                except Exception as e:
+                    # keep what was generated; with nothing yet, answer like send_message does
+                    logger.error(f"AI stream failed for agent {agent.agent_id}: {e}")
+                    ai_ok = False
+                    if not parts:
+                        parts.append(f"Error: {str(e)}")
+                        events.put_nowait({"event": "delta", "text": parts[0]})
+            response_ms = (time.perf_counter() - started) * 1000
+            ai_response = "".join(parts)
+            ai_ok = ai_ok and bool(ai_response) and not ai_response.startswith("AI service not available")
+
+            result = await self._complete_turn(agent, sess_id, user_id, ai_response, response_ms, ai_ok,
+                                               cache_key=cache_key, cached=cached)
+            result["first_token_ms"] = round(first_token_ms, 1) if first_token_ms is not None else None
+            events.put_nowait({"event": "done", **result})
+        except Exception as e:
+            logger.error(f"Failed to process message for agent {agent.agent_id}: {e}")
+            rollup_service.record_response(agent.agent_id, user_id, 0, success=False)
+            events.put_nowait({"event": "error", "error": str(e)})
+
+    async def _cached_reply(self, agent: VoiceAgent, message: str) -> Tuple[Optional[tuple], Optional[Dict[str, Any]]]:
+        """Response cache key for this turn and the cached reply; (None, None) unless the agent opted in"""
+        if not response_cache.enabled_for(agent.config):
+            return None, None
+        context = await ai_service.reply_context(agent.ai_session_id)
+        if context is None:
+            return None, None
+        key = response_cache.key(context["model"], context["system_message"], message, context["last_reply"],
+                                 agent.config.get("voice_profile", "professional_female"))
+        if key is None:
+            return None, None
+        return key, response_cache.get(agent.agent_id, key)
+
+    async def _complete_turn(self, agent: VoiceAgent, sess_id: str, user_id: Optional[str], ai_response: str,
+                             response_ms: float, ai_ok: bool, cache_key: Optional[tuple] = None,
+                             cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """TTS, transcript logging, response caching and stats for a finished AI reply; returns the turn payload"""
+        agent_id = agent.agent_id
+
+        # TTS generation (may result in None); cached replies may carry their audio already
+        voice_profile = agent.config.get("voice_profile", "professional_female")
+        audio_base64: Optional[str] = None
+        audio_generated = False
+        provider_used: Optional[str] = None
+        if cached and cached.get("audio_base64"):
+            audio_base64 = cached["audio_base64"]
+            audio_generated = True
+            provider_used = cached.get("provider")
+        else:
             try:
-                audio_base64 = await voice_service.text_to_speech(text=ai_response, voice_profile=voice_profile)
+                audio_base64, provider_used = await voice_service.synthesize(text=ai_response, voice_profile=voice_profile)
                 audio_generated = audio_base64 is not None
-                provider_used = voice_service.last_provider if audio_generated else None
             except Exception as tts_err:
                 logger.warning(f"TTS failed for agent {agent_id}, continuing with text-only: {tts_err}")
                 audio_base64 = None
                 audio_generated = False
                 provider_used = None
+            # cache successful replies, and add audio to a cached text-only reply once TTS works
+            if cache_key is not None and ai_ok and (not cached or audio_generated):
+                response_cache.put(agent_id, cache_key, ai_response, audio_base64, provider_used)
 
-            # Log agent message
-            await session_service.add_message(sess_id, role="agent", content={
-                "text_response": ai_response,
-                "audio_generated": audio_generated,
-                "provider_used": provider_used,
-            })
+        # Log agent message
+        await session_service.add_message(sess_id, role="agent", content={
+            "text_response": ai_response,
+            "audio_generated": audio_generated,
+            "provider_used": provider_used,
+        })
 
-            # Update agent activity
-            agent.conversation_count += 1
-            agent.last_activity = datetime.utcnow()
+        # Update agent activity
+        agent.conversation_count += 1
+        agent.last_activity = datetime.utcnow()
+        rollup_service.record_response(agent_id, user_id, response_ms, success=ai_ok,
+                                       cache_hit=bool(cached) if cache_key is not None else None)
 
-            return {
-                "text_response": ai_response,
-                "audio_response": audio_base64,
-                "audio_generated": audio_generated,
-                "provider_used": provider_used,
-                "agent_id": agent_id,
-                "agent_name": agent.name,
-                "session_id": sess_id,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            logger.error(f"Failed to process message for agent {agent_id}: {e}")
-            raise
+        return {
+            "text_response": ai_response,
+            "audio_response": audio_base64,
+            "audio_generated": audio_generated,
+            "provider_used": provider_used,
+            "agent_id": agent_id,
+            "agent_name": agent.name,
+            "session_id": sess_id,
+            "cached": bool(cached),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    async def close(self) -> None:
+        """Let streamed turns still running finish logging their replies"""
+        if self._turn_tasks:
+            await asyncio.gather(*list(self._turn_tasks), return_exceptions=True)
     
     async def process_voice_message(self, agent_id: str, audio_data: bytes, language: str = "en-US", user_id: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process voice message through the agent"""
@@ -250,6 +370,15 @@ class AgentService:
             logger.error(f"Failed to remove agent {agent_id}: {e}")
             return False
     
+    async def set_response_cache(self, agent_id: str, enabled: bool) -> bool:
+        """Opt an agent in or out of the response cache"""
+        if agent_id not in self.active_agents:
+            return False
+        agent = self.active_agents[agent_id]
+        agent.config["response_cache_enabled"] = enabled
+        await mongodb_repository.update_agent(agent_id, {"config": agent.config})
+        return True
+    
     def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         if agent_id in self.active_agents:
             return self.active_agents[agent_id].to_dict()
@@ -3,41 +3,84 @@ AI Service Integration for Universal Agent Platform
 Handles LLM interactions using emergentintegrations
 """
 import os
+import json
 import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Any
 import uuid
 
-try:
-    import openai
-except ImportError:
-    openai = None
+from .chat_history import ChatHistory, HISTORY_SUMMARY_TOKENS
+from .chat_session_store import ChatSessionStore
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# cheap model used to fold old turns into the rolling conversation summary
+HISTORY_SUMMARY_MODEL = os.getenv("HISTORY_SUMMARY_MODEL", "gpt-4o-mini")
+
 class AIService:
     """Core AI service for managing LLM interactions"""
     
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.active_chats: Dict[str, dict] = {}
-        self.client = None
+        # bounded LRU; idle and overflow sessions are spilled to Mongo and rehydrated on use
+        self.active_chats = ChatSessionStore()
+        # identical concurrent completions (same model and messages) share one provider call
+        self.completions = SingleFlight("ai_completions")
+        # the async OpenAI client (and the openai package) is loaded on first use or by warm_up
+        self._client_lock = threading.Lock()
+        self._client = None
+        self._client_loaded = False
         
         if not self.openai_api_key:
             logger.warning("OpenAI API key not found. AI features will be limited.")
-        elif openai:
-            self.client = openai.OpenAI(api_key=self.openai_api_key)
-        else:
-            logger.warning("OpenAI package not installed. AI features will be limited.")
+    
+    @property
+    def client(self):
+        if not self._client_loaded:
+            # warm_up builds the client in a worker thread while requests may already ask for it
+            with self._client_lock:
+                if not self._client_loaded:
+                    if self.openai_api_key:
+                        try:
+                            import openai
+                            from .http_clients import provider_async_http_client
+                            self._client = openai.AsyncOpenAI(api_key=self.openai_api_key,
+                                                              http_client=provider_async_http_client())
+                        except ImportError:
+                            logger.warning("OpenAI package not installed. AI features will be limited.")
+                    self._client_loaded = True
+        return self._client
+    
+    async def warm_up(self, connect: bool = False) -> Optional[str]:
+        """Import openai and build the client off the event loop.
+
+        With connect=True also makes one cheap API call so the TLS connection is
+        already open in the client's pool when the first chat request arrives.
+        """
+        client = await asyncio.to_thread(lambda: self.client)
+        if client is None:
+            return "not configured"
+        if connect:
+            await client.models.list()
+            return "connected"
+        return "loaded"
     
     async def create_agent_chat(
         self, 
         agent_id: str,
         agent_type: str = "customer_service",
         model: str = "gpt-4o",
-        system_message: str = None
+        system_message: str = None,
+        history_limit: Optional[int] = None
     ) -> str:
-        """Create a new chat session for an agent"""
+        """Create a new chat session for an agent.
+
+        history_limit caps the messages sent verbatim (the agent's conversation_history_limit);
+        older ones are summarized.
+        """
         
         if not system_message:
             system_message = self._get_system_message(agent_type)
@@ -48,10 +91,11 @@ class AIService:
             chat_data = {
                 "model": model,
                 "system_message": system_message,
-                "messages": [{"role": "system", "content": system_message}]
+                "history": ChatHistory(system_message, model=model, message_limit=history_limit),
+                "summary_task": None
             }
             
-            self.active_chats[session_id] = chat_data
+            self.active_chats.put(session_id, chat_data)
             logger.info(f"Created AI chat session: {session_id}")
             return session_id
             
@@ -67,41 +111,148 @@ class AIService:
     ) -> str:
         """Send message to AI agent and get response"""
         
-        if session_id not in self.active_chats:
-            raise ValueError(f"Chat session {session_id} not found")
-        
-        if not self.client:
-            return "AI service not available. Please configure OpenAI API key."
-        
-        chat_data = self.active_chats[session_id]
-        
-        try:
-            # Add user message to conversation
-            chat_data["messages"].append({"role": "user", "content": message})
+        # pinned: the chat must still be resident when the reply is appended
+        async with self.active_chats.use(session_id) as chat_data:
+            if chat_data is None:
+                raise ValueError(f"Chat session {session_id} not found")
             
-            # Send message and get response
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=chat_data["model"],
-                messages=chat_data["messages"],
-                max_tokens=4096
-            )
+            if not self.client:
+                return "AI service not available. Please configure OpenAI API key."
             
-            ai_response = response.choices[0].message.content
-            chat_data["messages"].append({"role": "assistant", "content": ai_response})
+            try:
+                # Add user message to conversation
+                history: ChatHistory = chat_data["history"]
+                history.append("user", message)
+                
+                # Send message and get response
+                model = chat_data["model"]
+                messages = history.window()
+                key = (model, hashlib.sha256(json.dumps(messages, separators=(",", ":")).encode()).hexdigest())
+                response = await self.completions.do(key, lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=4096
+                ))
+                
+                ai_response = response.choices[0].message.content
+                history.append("assistant", ai_response)
+                self._schedule_summary(chat_data)
+                
+                logger.info(f"AI response received for session {session_id}")
+                return ai_response
+                
+            except Exception as e:
+                logger.error(f"Failed to get AI response: {e}")
+                return f"Error: {str(e)}"
+    
+    async def stream_message(
+        self,
+        session_id: str,
+        message: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Send message to AI agent and yield the response text as it is generated.
+
+        Errors are raised rather than returned as text, since part of the answer may
+        already have been sent; whatever was generated is kept in the conversation.
+        """
+        
+        async with self.active_chats.use(session_id) as chat_data:
+            if chat_data is None:
+                raise ValueError(f"Chat session {session_id} not found")
             
-            logger.info(f"AI response received for session {session_id}")
-            return ai_response
+            if not self.client:
+                yield "AI service not available. Please configure OpenAI API key."
+                return
             
+            history: ChatHistory = chat_data["history"]
+            history.append("user", message)
+            parts: List[str] = []
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=chat_data["model"],
+                    messages=history.window(),
+                    max_tokens=4096,
+                    stream=True
+                )
+                try:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+                finally:
+                    await stream.close()
+                logger.info(f"AI response streamed for session {session_id}")
+            finally:
+                if parts:
+                    history.append("assistant", "".join(parts))
+                self._schedule_summary(chat_data)
+    
+    async def reply_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Model, system prompt and previous assistant reply of a chat (what a cached reply depends on)"""
+        chat_data = await self.active_chats.get(session_id)
+        if chat_data is None:
+            return None
+        history: ChatHistory = chat_data["history"]
+        last_reply = next((m["content"] for m in reversed(history.messages) if m["role"] == "assistant"), None)
+        return {"model": chat_data["model"], "system_message": chat_data["system_message"], "last_reply": last_reply}
+    
+    async def record_exchange(self, session_id: str, message: str, reply: str) -> None:
+        """Add a turn answered without the model (e.g. from the response cache) to the conversation"""
+        chat_data = await self.active_chats.get(session_id)
+        if chat_data is None:
+            raise ValueError(f"Chat session {session_id} not found")
+        chat_data["history"].append("user", message)
+        chat_data["history"].append("assistant", reply)
+    
+    def _schedule_summary(self, chat_data: dict) -> None:
+        """Fold evicted messages into the summary in the background, one update per chat at a time"""
+        history: ChatHistory = chat_data["history"]
+        task = chat_data.get("summary_task")
+        if history.folded and (task is None or task.done()):
+            chat_data["summary_task"] = asyncio.create_task(self._update_summary(history))
+    
+    async def _update_summary(self, history: ChatHistory) -> None:
+        folded = history.take_folded()
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in folded)
+        try:
+            response = await self.client.chat.completions.create(
+                model=HISTORY_SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": (
+                        "You maintain a running summary of a conversation between a user and an assistant. "
+                        "Merge the new messages into the existing summary. Keep names, facts, decisions, "
+                        "open questions and user preferences; drop pleasantries. Reply with the summary only."
+                    )},
+                    {"role": "user", "content": f"Existing summary:\n{history.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+                ],
+                max_tokens=HISTORY_SUMMARY_TOKENS
+            )
+            history.set_summary(response.choices[0].message.content or history.fallback_summary(folded))
+        except asyncio.CancelledError:
+            history.restore_folded(folded)
+            raise
         except Exception as e:
-            logger.error(f"Failed to get AI response: {e}")
-            return f"Error: {str(e)}"
+            logger.warning(f"Failed to summarize conversation history, keeping a clipped transcript: {e}")
+            history.set_summary(history.fallback_summary(folded))
+    
+    async def get_history_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        chat_data = await self.active_chats.get(session_id)
+        return chat_data["history"].stats() if chat_data else None
     
     async def end_session(self, session_id: str) -> None:
-        """End an AI chat session and clean up resources"""
-        if session_id in self.active_chats:
-            del self.active_chats[session_id]
-            logger.info(f"Ended AI chat session: {session_id}")
+        """End an AI chat session and clean up resources, including a spilled copy"""
+        chat_data = await self.active_chats.delete(session_id)
+        if chat_data is not None:
+            task = chat_data.get("summary_task")
+            if task is not None and not task.done():
+                task.cancel()
+        logger.info(f"Ended AI chat session: {session_id}")
+    
+    async def close(self) -> None:
+        """Write out evictions and deletes still buffered"""
+        await self.active_chats.close()
     
     def _get_system_message(self, agent_type: str) -> str:
         """Get system message based on agent type"""
@@ -154,8 +305,8 @@ Provide detailed, technical guidance while remaining accessible to users with va
         return system_messages.get(agent_type, system_messages["customer_service"])
     
     def get_active_sessions(self) -> List[str]:
-        """Get list of active chat sessions"""
-        return list(self.active_chats.keys())
+        """Get list of chat sessions resident in memory"""
+        return list(self.active_chats)
     
     def get_session_count(self) -> int:
         """Get count of active sessions"""
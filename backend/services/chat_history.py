@@ -0,0 +1,158 @@
+"""
+Chat History: token-budgeted conversation history for AI chat sessions
+- Sends the system prompt, a rolling summary of older turns and as many recent messages
+  as fit the token budget and the agent's conversation_history_limit
+- Token counts come from tiktoken (len/4 estimate when it is not installed) and are cached per message
+- Messages that no longer fit are folded into the summary instead of being resent every turn
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# prompt-side token budget per request (system prompt, summary and recent messages)
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "6000"))
+# messages kept verbatim when the agent does not set conversation_history_limit
+DEFAULT_HISTORY_LIMIT = int(os.environ.get("HISTORY_MESSAGE_LIMIT", "50"))
+# upper bound for the rolling summary, in tokens
+HISTORY_SUMMARY_TOKENS = int(os.environ.get("HISTORY_SUMMARY_TOKENS", "400"))
+
+# chat format overhead per message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed; estimating token counts as characters / 4")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base" if model.startswith(("gpt-4o", "o1", "o3")) else "cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int, model: str = "gpt-4o") -> str:
+    """Keep the end of `text` within `limit` tokens (the most recent part of a summary matters most)"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[-limit * 4:]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= limit else encoding.decode(tokens[-limit:])
+
+
+class ChatHistory:
+    """The conversation of one AI chat session"""
+
+    def __init__(self, system_message: str, model: str = "gpt-4o", token_budget: int = HISTORY_TOKEN_BUDGET,
+                 message_limit: Optional[int] = None):
+        self.system_message = system_message
+        self.model = model
+        self.token_budget = token_budget
+        self.message_limit = message_limit or DEFAULT_HISTORY_LIMIT
+        self.messages: List[Dict[str, str]] = []
+        self.summary = ""
+        self.folded: List[Dict[str, str]] = []  # evicted messages not yet merged into the summary
+        self._tokens: List[int] = []
+        self._fixed_tokens: Optional[int] = None  # system prompt + summary
+
+    def _count(self, message: Dict[str, str]) -> int:
+        return count_tokens(message["content"], self.model) + MESSAGE_OVERHEAD_TOKENS
+
+    def append(self, role: str, content: str) -> None:
+        message = {"role": role, "content": content}
+        self.messages.append(message)
+        self._tokens.append(self._count(message))
+
+    def system_prompt(self) -> str:
+        if not self.summary:
+            return self.system_message
+        return f"{self.system_message}\n\nSummary of the earlier conversation:\n{self.summary}"
+
+    def set_summary(self, summary: str) -> None:
+        self.summary = truncate_tokens(summary.strip(), HISTORY_SUMMARY_TOKENS, self.model)
+        self._fixed_tokens = None
+
+    def window(self) -> List[Dict[str, str]]:
+        """Messages for the next request; folds whatever no longer fits out of the history.
+
+        The newest message is always sent, even when it alone exceeds the budget.
+        """
+        if self._fixed_tokens is None:
+            self._fixed_tokens = count_tokens(self.system_prompt(), self.model) + MESSAGE_OVERHEAD_TOKENS
+        remaining = self.token_budget - self._fixed_tokens
+        keep = 0
+        for tokens in reversed(self._tokens):
+            if keep and (keep >= self.message_limit or tokens > remaining):
+                break
+            remaining -= tokens
+            keep += 1
+        if keep < len(self.messages):
+            cut = len(self.messages) - keep
+            self.folded.extend(self.messages[:cut])
+            del self.messages[:cut]
+            del self._tokens[:cut]
+        return [{"role": "system", "content": self.system_prompt()}, *self.messages]
+
+    def take_folded(self) -> List[Dict[str, str]]:
+        folded, self.folded = self.folded, []
+        return folded
+
+    def restore_folded(self, folded: List[Dict[str, str]]) -> None:
+        """Put messages back for the next summary attempt"""
+        self.folded[:0] = folded
+
+    def fallback_summary(self, folded: List[Dict[str, str]]) -> str:
+        """Summary without a model call: the previous summary plus a clipped line per folded message"""
+        lines = [self.summary] if self.summary else []
+        for message in folded:
+            text = " ".join(message["content"].split())
+            lines.append(f"{message['role']}: {text[:200]}{'...' if len(text) > 200 else ''}")
+        return "\n".join(lines)
+
+    def approx_bytes(self) -> int:
+        """Rough in-memory size of the text held (messages, folded messages, prompt and summary)"""
+        return (len(self.system_message) + len(self.summary)
+                + sum(len(m["content"]) for m in self.messages) + sum(len(m["content"]) for m in self.folded))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "system_message": self.system_message,
+            "model": self.model,
+            "token_budget": self.token_budget,
+            "message_limit": self.message_limit,
+            # folded messages are resent as history; they get summarized after rehydration
+            "messages": [*self.folded, *self.messages],
+            "summary": self.summary,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatHistory":
+        history = cls(data["system_message"], model=data.get("model", "gpt-4o"),
+                      token_budget=data.get("token_budget", HISTORY_TOKEN_BUDGET),
+                      message_limit=data.get("message_limit"))
+        history.summary = data.get("summary", "")
+        for message in data.get("messages", []):
+            history.append(message["role"], message["content"])
+        return history
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self.messages),
+            "message_tokens": sum(self._tokens),
+            "summary_tokens": count_tokens(self.summary, self.model) if self.summary else 0,
+            "folded_pending": len(self.folded),
+            "token_budget": self.token_budget,
+            "message_limit": self.message_limit,
+        }
@@ -0,0 +1,253 @@
+"""
+Chat Session Store: bounded in-memory home of AIService chat sessions
+- LRU with a maximum size and an idle TTL; evicted sessions are spilled to MongoDB
+  (zlib-compressed JSON in ai_chat_sessions) through a write-behind buffer
+- A session asked for after eviction is rehydrated transparently, from the spill buffer or Mongo
+- Sessions pinned by use() (a reply in progress) are never evicted
+- Gauges: resident sessions and bytes, evictions, spills and rehydrations
+"""
+import os
+import json
+import time
+import zlib
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from bson import Binary
+from pymongo import DeleteOne, ReplaceOne
+
+from repositories.indexes import apply_indexes, index
+from .chat_history import ChatHistory
+from .write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+SPILL_INDEXES = {"ai_chat_sessions": [index(("expires_at", 1), expire_after_seconds=0)]}
+
+
+def dump_chat(chat: Dict[str, Any]) -> bytes:
+    data = {"model": chat["model"], "system_message": chat["system_message"], "history": chat["history"].to_dict()}
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 6)
+
+
+def load_chat(blob: bytes) -> Dict[str, Any]:
+    data = json.loads(zlib.decompress(blob))
+    return {
+        "model": data["model"],
+        "system_message": data["system_message"],
+        "history": ChatHistory.from_dict(data["history"]),
+        "summary_task": None,
+    }
+
+
+class ChatSessionStore(WriteBehindBuffer):
+    """LRU of chat sessions that spills what it evicts to Mongo"""
+
+    def __init__(self, db=None):
+        super().__init__(
+            name="ai_chat_sessions",
+            flush_interval=float(os.environ.get("AI_SESSION_SPILL_INTERVAL", "2")),
+            max_pending=int(os.environ.get("AI_SESSION_SPILL_MAX_PENDING", "100")),
+        )
+        self.max_sessions = int(os.environ.get("AI_SESSION_MAX", "1000"))
+        self.idle_ttl = float(os.environ.get("AI_SESSION_IDLE_TTL", "1800"))
+        self.retention = timedelta(days=float(os.environ.get("AI_SESSION_SPILL_RETENTION_DAYS", "30")))
+        self.db = None
+        self.collection = None
+        # session_id -> (last used, chat); least recently used first
+        self._resident: "OrderedDict[str, Any]" = OrderedDict()
+        self._spill: Dict[str, Optional[Dict[str, Any]]] = {}  # None marks a delete
+        self._inflight: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._pins: Dict[str, int] = {}  # session_id -> requests using it; never evicted while > 0
+        self.evictions = {"lru": 0, "idle": 0}
+        self.spilled = 0
+        self.spilled_bytes = 0
+        self.rehydrated = 0
+        self.rehydrate_misses = 0
+        if db is not None:
+            self.init(db)
+
+    def init(self, db) -> None:
+        """Bind the spill collection"""
+        self.db = db
+        self.collection = db["ai_chat_sessions"]
+
+    async def ensure_indexes(self) -> Dict[str, Any]:
+        return await apply_indexes(self.db, SPILL_INDEXES)
+
+    # ---- resident set ----
+
+    def put(self, session_id: str, chat: Dict[str, Any]) -> None:
+        self._resident[session_id] = (time.monotonic(), chat)
+        self._resident.move_to_end(session_id)
+        self._spill.pop(session_id, None)
+        self.sweep()
+
+    def sweep(self) -> None:
+        """Evict idle sessions, then least recently used ones beyond max_sessions; pinned sessions stay"""
+        cutoff = time.monotonic() - self.idle_ttl
+        excess = len(self._resident) - self.max_sessions
+        victims = []
+        for session_id, (last_used, _) in self._resident.items():
+            if session_id in self._pins:
+                continue
+            if excess > 0:
+                victims.append((session_id, "lru"))
+                excess -= 1
+            elif last_used < cutoff:
+                victims.append((session_id, "idle"))
+            else:
+                break
+        for session_id, reason in victims:
+            self._evict(session_id, reason)
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        _, chat = self._resident.pop(session_id)
+        task = chat.get("summary_task")
+        if task is not None and not task.done():
+            task.cancel()  # puts its folded messages back, so they are spilled too
+        self._spill[session_id] = chat
+        self.evictions[reason] += 1
+        self._notify()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._resident
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._resident))
+
+    # ---- lookups ----
+
+    @asynccontextmanager
+    async def use(self, session_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """get(), with the chat pinned until the block exits.
+
+        A reply is appended after the provider call returns; without the pin the chat
+        could be evicted and spilled meanwhile, and the reply would never be written.
+        """
+        chat = await self.get(session_id)
+        if chat is None:
+            yield None
+            return
+        self._pins[session_id] = self._pins.get(session_id, 0) + 1
+        try:
+            yield chat
+        finally:
+            self._pins[session_id] -= 1
+            if not self._pins[session_id]:
+                del self._pins[session_id]
+            if session_id in self._resident:
+                self._resident[session_id] = (time.monotonic(), chat)
+                self._resident.move_to_end(session_id)
+            self.sweep()  # it may have been kept over max_sessions
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The session's chat, rehydrated if it was evicted; None if it never existed or was deleted"""
+        entry = self._resident.get(session_id)
+        if entry is not None:
+            self._resident[session_id] = (time.monotonic(), entry[1])
+            self._resident.move_to_end(session_id)
+            self.sweep()
+            return entry[1]
+        # evicted but not written yet: take it straight back
+        for buffered in (self._spill, self._inflight):
+            if session_id in buffered:
+                chat = buffered.get(session_id)
+                if chat is None:
+                    return None
+                self.put(session_id, chat)
+                self.rehydrated += 1
+                return chat
+        loading = self._loading.get(session_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(session_id))
+            self._loading[session_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(session_id, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self.collection.find_one({"_id": session_id})
+        if session_id in self._resident:  # created or rehydrated meanwhile
+            return self._resident[session_id][1]
+        if any(buffered.get(session_id, ...) is None for buffered in (self._spill, self._inflight)):
+            return None  # deleted meanwhile; the stale document must not revive it
+        if doc is None:
+            self.rehydrate_misses += 1
+            return None
+        chat = load_chat(doc["data"])
+        self.put(session_id, chat)
+        self.rehydrated += 1
+        logger.info(f"Rehydrated AI chat session {session_id}")
+        return chat
+
+    async def delete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Forget a session everywhere; returns its resident chat, if any"""
+        entry = self._resident.pop(session_id, None)
+        self._spill[session_id] = None
+        self._notify()
+        return entry[1] if entry else None
+
+    # ---- spilling (write-behind) ----
+
+    def pending(self) -> int:
+        return len(self._spill)
+
+    def _drain(self):
+        batch, self._spill = self._spill, {}
+        self._inflight = batch
+        return batch
+
+    def _restore(self, batch) -> None:
+        for session_id, chat in batch.items():
+            # a newer eviction or delete of the same session wins; a rehydrated one needs no spill
+            if session_id not in self._spill and session_id not in self._resident:
+                self._spill[session_id] = chat
+        self._inflight = {}
+
+    async def _write(self, batch) -> None:
+        now = datetime.utcnow()
+        ops = []
+        written = 0
+        for session_id, chat in batch.items():
+            if chat is None:
+                ops.append(DeleteOne({"_id": session_id}))
+                continue
+            blob = dump_chat(chat)
+            written += len(blob)
+            ops.append(ReplaceOne({"_id": session_id}, {
+                "data": Binary(blob),
+                "size": len(blob),
+                "spilled_at": now,
+                "expires_at": now + self.retention,
+            }, upsert=True))
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+        self.spilled += sum(1 for chat in batch.values() if chat is not None)
+        self.spilled_bytes += written
+        self._inflight = {}
+
+    # ---- gauges ----
+
+    def stats(self) -> Dict[str, Any]:
+        self.sweep()
+        return {
+            **super().stats(),
+            "resident_sessions": len(self._resident),
+            "pinned_sessions": len(self._pins),
+            "resident_bytes": sum(chat["history"].approx_bytes() for _, chat in self._resident.values()),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_s": self.idle_ttl,
+            "evictions": dict(self.evictions),
+            "spilled": self.spilled,
+            "spilled_bytes": self.spilled_bytes,
+            "rehydrated": self.rehydrated,
+            "rehydrate_misses": self.rehydrate_misses,
+        }
@@ -0,0 +1,175 @@
+"""
+Health Service: background reachability probes for the platform's dependencies
+- Probes MongoDB, OpenAI, Azure Speech, ElevenLabs and LiveKit on an interval, each with a timeout
+- Keeps the last result, latency and a moving average per dependency
+- /health serves the cached snapshot; /ready combines it with the startup state
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .mongo_client import mongo_registry
+
+logger = logging.getLogger(__name__)
+
+# dependencies without which requests cannot be served; the rest only degrade features
+CRITICAL = ("mongodb",)
+
+
+class ProbeSkipped(Exception):
+    """The dependency is not configured, so there is nothing to probe"""
+
+
+class HealthService:
+    """Runs probes in the background and keeps the latest result of each"""
+
+    def __init__(self):
+        self.interval = float(os.environ.get("HEALTH_PROBE_INTERVAL", "15"))
+        self.timeout = float(os.environ.get("HEALTH_PROBE_TIMEOUT", "3"))
+        self.probes: Dict[str, Callable[[], Awaitable[Optional[str]]]] = {
+            "mongodb": self._probe_mongodb,
+            "openai": self._probe_openai,
+            "azure_speech": self._probe_azure_speech,
+            "elevenlabs": self._probe_elevenlabs,
+            "livekit": self._probe_livekit,
+        }
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._http: Optional[Any] = None  # aiohttp.ClientSession, imported with the first probe
+        self._task: Optional[asyncio.Task] = None
+        self._rounds = 0
+        self.started_up = False
+
+    # ---- probes: return an optional detail string, raise on failure ----
+
+    async def _get(self, url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None) -> str:
+        if self._http is None or self._http.closed:
+            import aiohttp
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        async with self._http.request(method, url, headers=headers) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(f"HTTP {resp.status}")
+            return f"HTTP {resp.status}"
+
+    async def _probe_mongodb(self) -> Optional[str]:
+        await mongo_registry.get_client().admin.command("ping")
+        return None
+
+    async def _probe_openai(self) -> Optional[str]:
+        key = os.getenv("OPENAI_API_KEY")
+        if not key:
+            raise ProbeSkipped()
+        return await self._get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {key}"})
+
+    async def _probe_azure_speech(self) -> Optional[str]:
+        key = os.getenv("AZURE_SPEECH_KEY")
+        if not key:
+            raise ProbeSkipped()
+        region = os.getenv("AZURE_SPEECH_REGION", "eastus")
+        # issuing a short-lived token is the cheapest authenticated call
+        return await self._get(f"https://{region}.api.cognitive.microsoft.com/sts/v1.0/issueToken",
+                               method="POST", headers={"Ocp-Apim-Subscription-Key": key})
+
+    async def _probe_elevenlabs(self) -> Optional[str]:
+        key = os.getenv("ELEVENLABS_API_KEY")
+        if not key:
+            raise ProbeSkipped()
+        return await self._get("https://api.elevenlabs.io/v1/user", headers={"xi-api-key": key})
+
+    async def _probe_livekit(self) -> Optional[str]:
+        url = os.getenv("LIVEKIT_URL")
+        if not url:
+            raise ProbeSkipped()
+        # the server answers plain HTTP on the same host as its websocket endpoint
+        http_url = url.replace("wss://", "https://", 1).replace("ws://", "http://", 1)
+        return await self._get(http_url)
+
+    # ---- scheduling ----
+
+    async def _run_probe(self, name: str, probe: Callable[[], Awaitable[Optional[str]]]) -> None:
+        previous = self._results.get(name, {})
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"checked_at": datetime.utcnow().isoformat()}
+        try:
+            detail = await asyncio.wait_for(probe(), timeout=self.timeout)
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            avg = previous.get("avg_latency_ms")
+            result.update({
+                "status": "up",
+                "latency_ms": latency_ms,
+                # exponential moving average so one slow probe does not dominate
+                "avg_latency_ms": latency_ms if avg is None else round(0.8 * avg + 0.2 * latency_ms, 1),
+                "consecutive_failures": 0,
+            })
+            if detail:
+                result["detail"] = detail
+        except ProbeSkipped:
+            result["status"] = "not_configured"
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            result.update({
+                "status": "down",
+                "error": error,
+                "avg_latency_ms": previous.get("avg_latency_ms"),
+                "consecutive_failures": previous.get("consecutive_failures", 0) + 1,
+            })
+            if previous.get("status") != "down":
+                logger.warning(f"Health probe {name} failed: {error}")
+        self._results[name] = result
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self._run_probe(n, p) for n, p in self.probes.items()))
+        self._rounds += 1
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name="health-prober")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    # ---- read side ----
+
+    def snapshot(self) -> Dict[str, Any]:
+        services = dict(self._results)
+        if not services:
+            status = "starting"
+        elif any(services.get(n, {}).get("status") != "up" for n in CRITICAL):
+            status = "unhealthy"
+        elif any(r.get("status") == "down" for r in services.values()):
+            status = "degraded"
+        else:
+            status = "healthy"
+        return {"status": status, "probe_interval_s": self.interval, "services": services}
+
+    def readiness(self) -> Dict[str, Any]:
+        """Ready once startup finished, a probe round completed and critical dependencies are up"""
+        critical_up = all(self._results.get(n, {}).get("status") == "up" for n in CRITICAL)
+        return {
+            "ready": self.started_up and self._rounds > 0 and critical_up,
+            "started_up": self.started_up,
+            "probe_rounds": self._rounds,
+            "critical": {n: self._results.get(n, {}).get("status", "unknown") for n in CRITICAL},
+        }
+
+
+health_service = HealthService()
@@ -0,0 +1,40 @@
+"""
+HTTP clients for provider SDKs (OpenAI, ElevenLabs)
+- One keep-alive httpx client per provider, so a connection opened during warm-up is reused by requests
+- HTTP/2 when the h2 package is installed, HTTP/1.1 keep-alive otherwise
+- Pool size and timeouts come from PROVIDER_HTTP_* env vars
+"""
+import os
+import importlib.util
+from typing import Any, Dict
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _client_options(httpx) -> Dict[str, Any]:
+    return dict(
+        http2=http2_available(),
+        timeout=httpx.Timeout(
+            float(os.environ.get("PROVIDER_HTTP_TIMEOUT", "60")),
+            connect=float(os.environ.get("PROVIDER_HTTP_CONNECT_TIMEOUT", "5")),
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.environ.get("PROVIDER_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.environ.get("PROVIDER_HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.environ.get("PROVIDER_HTTP_KEEPALIVE_EXPIRY", "120")),
+        ),
+    )
+
+
+def provider_http_client():
+    """A synchronous httpx.Client for an SDK that accepts one (imports httpx on call)"""
+    import httpx
+    return httpx.Client(**_client_options(httpx))
+
+
+def provider_async_http_client():
+    """The httpx.AsyncClient counterpart, for async SDK clients"""
+    import httpx
+    return httpx.AsyncClient(**_client_options(httpx))
@@ -6,12 +6,22 @@ import os
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any
-from livekit import api
 from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
 
+_api = None
+
+
+def _livekit_api():
+    """Import livekit.api on first use; the SDK pulls in protobuf and aiohttp at import"""
+    global _api
+    if _api is None:
+        from livekit import api
+        _api = api
+    return _api
+
 class LiveKitService:
     """LiveKit service for real-time communication"""
     
@@ -20,19 +30,11 @@ class LiveKitService:
         self.api_secret = os.getenv("LIVEKIT_API_SECRET")
         self.livekit_url = os.getenv("LIVEKIT_URL")
         
+        # the API client is created on first use (or by warm_up), not at import
+        self._client = None
+        self._initialized = False
         if not all([self.api_key, self.api_secret, self.livekit_url]):
             logger.warning("LiveKit credentials not complete. Real-time features will be limited.")
-            self.livekit_api = None
-        else:
-            try:
-                self.livekit_api = api.LiveKitAPI(
-                    url=self.livekit_url,
-                    api_key=self.api_key,
-                    api_secret=self.api_secret
-                )
-            except Exception as e:
-                logger.error(f"Failed to initialize LiveKit API: {e}")
-                self.livekit_api = None
         
         # Room configurations
         self.room_configs = {
@@ -53,6 +55,26 @@ class LiveKitService:
             }
         }
     
+    @property
+    def livekit_api(self):
+        if not self._initialized:
+            self._initialized = True
+            if all([self.api_key, self.api_secret, self.livekit_url]):
+                try:
+                    self._client = _livekit_api().LiveKitAPI(
+                        url=self.livekit_url,
+                        api_key=self.api_key,
+                        api_secret=self.api_secret
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to initialize LiveKit API: {e}")
+        return self._client
+    
+    async def warm_up(self) -> None:
+        """Import the SDK off the event loop, then create the client (it binds to the running loop)"""
+        await asyncio.to_thread(_livekit_api)
+        self.livekit_api
+    
     async def generate_token(
         self, 
         room_name: str, 
@@ -69,14 +91,14 @@ class LiveKitService:
             permissions = {"can_publish": True, "can_subscribe": True}
         
         try:
-            grants = api.VideoGrants(
+            grants = _livekit_api().VideoGrants(
                 room_join=True,
                 room=room_name,
                 can_publish=permissions.get("can_publish", True),
                 can_subscribe=permissions.get("can_subscribe", True)
             )
             
-            token = api.AccessToken(self.api_key, self.api_secret) \
+            token = _livekit_api().AccessToken(self.api_key, self.api_secret) \
                 .with_identity(participant_name) \
                 .with_name(participant_name) \
                 .with_grants(grants)
@@ -107,7 +129,7 @@ class LiveKitService:
             config["max_participants"] = max_participants
         
         try:
-            room_request = api.CreateRoomRequest(
+            room_request = _livekit_api().CreateRoomRequest(
                 name=room_name,
                 max_participants=config["max_participants"],
                 empty_timeout=config["empty_timeout"],
@@ -137,7 +159,7 @@ class LiveKitService:
         
         try:
             response = await self.livekit_api.room.list_rooms(
-                api.ListRoomsRequest()
+                _livekit_api().ListRoomsRequest()
             )
             
             rooms = []
@@ -164,7 +186,7 @@ class LiveKitService:
         
         try:
             await self.livekit_api.room.delete_room(
-                api.DeleteRoomRequest(room=room_name)
+                _livekit_api().DeleteRoomRequest(room=room_name)
             )
             
             logger.info(f"Deleted room: {room_name}")
@@ -182,7 +204,7 @@ class LiveKitService:
         
         try:
             response = await self.livekit_api.room.list_participants(
-                api.ListParticipantsRequest(room=room_name)
+                _livekit_api().ListParticipantsRequest(room=room_name)
             )
             
             participants = []
@@ -209,7 +231,7 @@ class LiveKitService:
         
         try:
             await self.livekit_api.room.remove_participant(
-                api.RemoveParticipantRequest(
+                _livekit_api().RemoveParticipantRequest(
                     room=room_name,
                     identity=participant_identity
                 )
@@ -228,7 +250,10 @@ class LiveKitService:
     
     def is_configured(self) -> bool:
         """Check if LiveKit is properly configured"""
-        return self.livekit_api is not None
+        if not self._initialized:
+            # do not build the client just to answer this
+            return all([self.api_key, self.api_secret, self.livekit_url])
+        return self._client is not None
 
 # Global LiveKit service instance
 livekit_service = LiveKitService()
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Mongo Client Registry: one shared, tuned AsyncIOMotorClient per MongoDB URL
+- Every service and the repository draw their databases from the same pool
+- Pool sizes, timeouts and wire compression come from one set of MONGO_* env vars
+- Records connection checkout wait times so worker and pool sizes can be tuned
+"""
+import asyncio
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open-ended
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class PoolCheckoutMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener tracking checkout wait time and pool occupancy.
+
+    pymongo emits check-out-started and checked-out on the thread doing the
+    checkout, so a thread-local start time pairs the two events.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.connections_open = 0
+        self.connections_in_use = 0
+        self.pools_cleared = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        wait_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        self._local.started = None
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.wait_histogram[bucket] += 1
+            self.connections_in_use += 1
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.connections_in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={b}ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else None,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "wait_histogram": dict(zip(labels, self.wait_histogram)),
+                "connections_open": self.connections_open,
+                "connections_in_use": self.connections_in_use,
+                "pools_cleared": self.pools_cleared,
+            }
+
+
+def _env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+class MongoClientRegistry:
+    """Hands out one AsyncIOMotorClient per URL, configured from the environment"""
+
+    def __init__(self):
+        self._clients: Dict[str, AsyncIOMotorClient] = {}
+        self.metrics = PoolCheckoutMetrics()
+
+    @staticmethod
+    def default_url() -> str:
+        return os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+    @staticmethod
+    def default_db_name() -> str:
+        return os.environ.get("DB_NAME", "aiimpact_platform")
+
+    def client_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+            "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+            "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+            "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            "appname": os.environ.get("MONGO_APP_NAME", "aimpact-backend"),
+            "event_listeners": [self.metrics],
+        }
+        optional = {
+            "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS"),
+            "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+            "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS"),
+            "maxConnecting": _env_int("MONGO_MAX_CONNECTING"),
+        }
+        options.update({k: v for k, v in optional.items() if v is not None})
+        compressors = os.environ.get("MONGO_COMPRESSORS", "").strip()
+        if compressors:
+            # e.g. "zstd,snappy,zlib"; zstd/snappy need their python packages installed
+            options["compressors"] = compressors
+        return options
+
+    def get_client(self, url: Optional[str] = None) -> AsyncIOMotorClient:
+        url = url or self.default_url()
+        client = self._clients.get(url)
+        if client is None:
+            client = AsyncIOMotorClient(url, **self.client_options())
+            self._clients[url] = client
+        return client
+
+    def get_database(self, name: Optional[str] = None, url: Optional[str] = None):
+        return self.get_client(url)[name or self.default_db_name()]
+
+    async def connect(self) -> None:
+        """Verify connectivity of the default client"""
+        await self.get_client().admin.command("ping")
+
+    async def warm_pool(self, size: Optional[int] = None) -> int:
+        """Open `size` connections on the default client by running that many pings at once.
+
+        Each concurrent command checks out its own connection, so the pool holds at
+        least `size` idle sockets afterwards (bounded by maxPoolSize). Defaults to
+        MONGO_WARM_POOL_SIZE, falling back to minPoolSize or 10.
+        """
+        options = self.client_options()
+        size = size or _env_int("MONGO_WARM_POOL_SIZE") or options["minPoolSize"] or 10
+        size = min(size, options["maxPoolSize"] or size)
+        admin = self.get_client().admin
+        await asyncio.gather(*(admin.command("ping") for _ in range(size)))
+        return self.metrics.snapshot()["connections_open"]
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "options": {k: v for k, v in self.client_options().items() if k != "event_listeners"},
+            "checkout": self.metrics.snapshot(),
+        }
+
+
+mongo_registry = MongoClientRegistry()
@@ -1,11 +1,19 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-import stripe
 import os
+import asyncio
 from dataclasses import dataclass
 
-# Initialize Stripe
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+_stripe = None
+
+def get_stripe():
+    """The stripe module, imported and keyed on first use rather than at app import"""
+    global _stripe
+    if _stripe is None:
+        import stripe
+        stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+        _stripe = stripe
+    return _stripe
 
 @dataclass
 class UsageMetrics:
@@ -114,6 +122,10 @@ class PaymentService:
             )
         }
     
+    async def warm_up(self) -> None:
+        """Import stripe off the event loop so the first payment request does not pay for it"""
+        await asyncio.to_thread(get_stripe)
+    
     def get_pricing_tiers(self) -> Dict[str, PricingTier]:
         """Get all available pricing tiers"""
         return self.pricing_tiers
@@ -125,6 +137,7 @@ class PaymentService:
     async def create_customer(self, email: str, name: Optional[str] = None, 
                             metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Create a new Stripe customer"""
+        stripe = get_stripe()
         try:
             customer_metadata = {
                 "platform": "universal_agent_platform",
@@ -154,6 +167,7 @@ class PaymentService:
     async def create_subscription(self, customer_id: str, tier_id: str, 
                                 payment_method_id: Optional[str] = None) -> Dict[str, Any]:
         """Create a new subscription for a customer"""
+        stripe = get_stripe()
         tier = self.get_tier_by_id(tier_id)
         if not tier or not tier.stripe_price_id:
             return {
@@ -203,6 +217,7 @@ class PaymentService:
     
     async def update_subscription(self, subscription_id: str, new_tier_id: str) -> Dict[str, Any]:
         """Update subscription to a new tier"""
+        stripe = get_stripe()
         new_tier = self.get_tier_by_id(new_tier_id)
         if not new_tier or not new_tier.stripe_price_id:
             return {
@@ -246,6 +261,7 @@ class PaymentService:
     async def cancel_subscription(self, subscription_id: str, 
                                 immediately: bool = False) -> Dict[str, Any]:
         """Cancel a subscription"""
+        stripe = get_stripe()
         try:
             if immediately:
                 subscription = stripe.Subscription.delete(subscription_id)
@@ -270,6 +286,7 @@ class PaymentService:
     
     async def get_customer_subscriptions(self, customer_id: str) -> Dict[str, Any]:
         """Get all subscriptions for a customer"""
+        stripe = get_stripe()
         try:
             subscriptions = stripe.Subscription.list(customer=customer_id)
             
@@ -341,6 +358,7 @@ class PaymentService:
     
     async def create_portal_session(self, customer_id: str, return_url: str) -> Dict[str, Any]:
         """Create a Stripe customer portal session"""
+        stripe = get_stripe()
         try:
             session = stripe.billing_portal.Session.create(
                 customer=customer_id,
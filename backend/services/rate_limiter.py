@@ -0,0 +1,315 @@
+"""
+Rate limiting for Universal Agent Platform API keys
+- GCRA (generic cell rate algorithm): one float of state per key, O(1) per check
+- Sustained rate is requests per minute; burst is how many may arrive back-to-back
+- Pluggable backends behind one interface:
+    memory  per-process state (default, single worker)
+    shm     POSIX shared memory shared by all workers on one host
+    mongo   atomic fixed-window counters in MongoDB for multi-node deployments
+"""
+import asyncio
+import fcntl
+import hashlib
+import math
+import os
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# back-off between attempts on a contended shared-memory stripe lock, in seconds
+SHM_LOCK_RETRY_DELAY = 0.0001
+SHM_LOCK_RETRY_MAX_DELAY = 0.005
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the next request would be allowed (0 if allowed)
+    reset_after: float  # seconds until the bucket is completely refilled
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra_step(tat: Optional[float], now: float, rate_per_minute: int, burst: int):
+    """Evaluate one request against a stored theoretical arrival time (TAT).
+
+    Returns ``(new_tat, result)``; ``new_tat`` equals ``tat`` when the request
+    is rejected so callers can store it unconditionally.
+    """
+    rate_per_minute = max(1, int(rate_per_minute))
+    burst = max(1, int(burst))
+    interval = 60.0 / rate_per_minute
+    burst_offset = interval * burst
+
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - burst_offset
+    if now < allow_at:
+        return tat, RateLimitResult(
+            allowed=False,
+            limit=burst,
+            remaining=0,
+            retry_after=allow_at - now,
+            reset_after=tat - now,
+        )
+    remaining = int((now - allow_at) / interval)
+    return new_tat, RateLimitResult(
+        allowed=True,
+        limit=burst,
+        remaining=min(burst - 1, remaining),
+        retry_after=0.0,
+        reset_after=new_tat - now,
+    )
+
+
+class RateLimiterBackend:
+    """Interface shared by all limiter backends used by require_api_key"""
+
+    name = "base"
+
+    async def check(self, key: str, rate_per_minute: int, burst: Optional[int] = None) -> RateLimitResult:
+        raise NotImplementedError
+
+    async def reset(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class InProcessRateLimiter(RateLimiterBackend):
+    """In-process GCRA limiter keyed by API key id"""
+
+    name = "memory"
+
+    def __init__(self, prune_every: int = 10000):
+        self._tat: Dict[str, float] = {}
+        self._prune_every = prune_every
+        self._checks = 0
+
+    async def check(self, key: str, rate_per_minute: int, burst: Optional[int] = None) -> RateLimitResult:
+        now = time.monotonic()
+        new_tat, result = gcra_step(self._tat.get(key), now, rate_per_minute, burst or rate_per_minute)
+        self._tat[key] = new_tat
+        self._checks += 1
+        if self._checks % self._prune_every == 0:
+            self._prune(now)
+        return result
+
+    async def reset(self, key: str) -> None:
+        self._tat.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        # a TAT in the past is equivalent to a full bucket, so the entry can go
+        stale = [k for k, tat in self._tat.items() if tat <= now]
+        for k in stale:
+            del self._tat[k]
+
+
+class SharedMemoryRateLimiter(RateLimiterBackend):
+    """GCRA state in a named POSIX shared-memory table shared by every worker on the host.
+
+    The table is set-associative: a key hashes to a group of ``group_size``
+    slots of (fingerprint, TAT). Groups are guarded by byte-range ``lockf``
+    locks on a lock file, striped over ``lock_stripes`` bytes. When a group is
+    full, an expired slot (a full bucket) is reused first, otherwise the slot
+    with the oldest TAT is taken over, which can only make that other key more
+    permissive. Size the table well above the number of active keys.
+    """
+
+    name = "shm"
+    _SLOT = struct.Struct("<Qd")
+
+    def __init__(
+        self,
+        shm_name: Optional[str] = None,
+        slots: Optional[int] = None,
+        group_size: int = 8,
+        lock_path: Optional[str] = None,
+        lock_stripes: int = 256,
+    ):
+        self.shm_name = shm_name or os.environ.get("RATE_LIMIT_SHM_NAME", "uap_rate_limits")
+        slots = slots or int(os.environ.get("RATE_LIMIT_SHM_SLOTS", "65536"))
+        self.group_size = group_size
+        self.groups = max(1, slots // group_size)
+        self.lock_stripes = lock_stripes
+        size = self.groups * group_size * self._SLOT.size
+        self._shm = self._attach(self.shm_name, size)
+        self._buf = self._shm.buf
+        lock_path = lock_path or os.environ.get("RATE_LIMIT_SHM_LOCK", f"/tmp/{self.shm_name}.lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @staticmethod
+    def _attach(name: str, size: int) -> shared_memory.SharedMemory:
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name, create=False)
+            if shm.size < size:
+                raise ValueError(f"Shared memory segment {name} is smaller than the configured table")
+        # The segment must outlive any single worker; without this the resource
+        # tracker unlinks it when the process that attached it exits.
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+    def _fingerprint(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        fp = int.from_bytes(digest[:8], "little") or 1  # 0 marks an empty slot
+        group = int.from_bytes(digest[8:], "little") % self.groups
+        return fp, group
+
+    def _locked(self, group: int, op: int) -> None:
+        fcntl.lockf(self._lock_fd, op, 1, group % self.lock_stripes)
+
+    async def _acquire(self, group: int) -> None:
+        """Take the group's stripe lock without blocking the event loop.
+
+        Holders never await, so the lock is only ever held for a few microseconds
+        by another worker: try without blocking and back off briefly on contention.
+        """
+        delay = 0.0
+        while True:
+            try:
+                self._locked(group, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except (BlockingIOError, PermissionError):  # EAGAIN or EACCES, depending on the platform
+                await asyncio.sleep(delay)
+                delay = min(SHM_LOCK_RETRY_MAX_DELAY, delay * 2 or SHM_LOCK_RETRY_DELAY)
+
+    def _find_slot(self, base: int, fp: int, now: float):
+        """Return (offset, tat) for the key's slot, claiming one if needed"""
+        slot_size = self._SLOT.size
+        free = None
+        oldest, oldest_tat = None, None
+        for i in range(self.group_size):
+            offset = base + i * slot_size
+            slot_fp, tat = self._SLOT.unpack_from(self._buf, offset)
+            if slot_fp == fp:
+                return offset, tat
+            if free is None and (slot_fp == 0 or tat <= now):
+                free = offset
+            if oldest_tat is None or tat < oldest_tat:
+                oldest, oldest_tat = offset, tat
+        return (free if free is not None else oldest), None
+
+    async def check(self, key: str, rate_per_minute: int, burst: Optional[int] = None) -> RateLimitResult:
+        fp, group = self._fingerprint(key)
+        base = group * self.group_size * self._SLOT.size
+        await self._acquire(group)
+        try:
+            now = time.time()
+            offset, tat = self._find_slot(base, fp, now)
+            new_tat, result = gcra_step(tat, now, rate_per_minute, burst or rate_per_minute)
+            self._SLOT.pack_into(self._buf, offset, fp, new_tat)
+        finally:
+            self._locked(group, fcntl.LOCK_UN)
+        return result
+
+    async def reset(self, key: str) -> None:
+        fp, group = self._fingerprint(key)
+        base = group * self.group_size * self._SLOT.size
+        await self._acquire(group)
+        try:
+            for i in range(self.group_size):
+                offset = base + i * self._SLOT.size
+                if self._SLOT.unpack_from(self._buf, offset)[0] == fp:
+                    self._SLOT.pack_into(self._buf, offset, 0, 0.0)
+        finally:
+            self._locked(group, fcntl.LOCK_UN)
+
+    async def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+        os.close(self._lock_fd)
+
+
+class MongoRateLimiter(RateLimiterBackend):
+    """Atomic fixed-window counters in MongoDB, shared by every node.
+
+    The window is the time it takes to earn a full burst at the sustained
+    rate (``burst * 60 / rate`` seconds) and allows ``burst`` requests, so the
+    long-run rate matches the GCRA backends. Each check is a single
+    ``find_one_and_update`` with ``$inc``; a TTL index removes old windows.
+    """
+
+    name = "mongo"
+
+    def __init__(self, collection: Any):
+        self.collection = collection
+        self._indexed = False
+
+    async def _ensure_index(self) -> None:
+        if self._indexed:
+            return
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        await self.collection.create_index("key_id")  # reset() deletes every window of a key
+        self._indexed = True
+
+    async def check(self, key: str, rate_per_minute: int, burst: Optional[int] = None) -> RateLimitResult:
+        await self._ensure_index()
+        rate_per_minute = max(1, int(rate_per_minute))
+        burst = max(1, int(burst or rate_per_minute))
+        window = burst * 60.0 / rate_per_minute
+        now = time.time()
+        window_start = math.floor(now / window) * window
+        window_end = window_start + window
+        update = {
+            "$inc": {"count": 1},
+            "$setOnInsert": {"key_id": key, "expires_at": datetime.fromtimestamp(window_end + window, timezone.utc)},
+        }
+        query = {"_id": f"{key}:{int(window_start * 1000)}"}
+        try:
+            doc = await self.collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER, projection={"count": 1}
+            )
+        except DuplicateKeyError:
+            # two nodes raced to create the window document; the retry is a plain $inc
+            doc = await self.collection.find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER, projection={"count": 1}
+            )
+        count = int(doc.get("count", 1))
+        allowed = count <= burst
+        return RateLimitResult(
+            allowed=allowed,
+            limit=burst,
+            remaining=max(0, burst - count),
+            retry_after=0.0 if allowed else window_end - now,
+            reset_after=window_end - now,
+        )
+
+    async def reset(self, key: str) -> None:
+        await self._ensure_index()
+        await self.collection.delete_many({"key_id": key})
+
+
+def create_rate_limiter(backend: Optional[str] = None, collection: Any = None) -> RateLimiterBackend:
+    """Build the limiter selected by ``backend`` or the RATE_LIMIT_BACKEND env var"""
+    backend = (backend or os.environ.get("RATE_LIMIT_BACKEND", "memory")).lower()
+    if backend == "memory":
+        return InProcessRateLimiter()
+    if backend == "shm":
+        return SharedMemoryRateLimiter()
+    if backend == "mongo":
+        if collection is None:
+            raise ValueError("Mongo rate limiter requires a collection")
+        return MongoRateLimiter(collection)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
@@ -0,0 +1,76 @@
+"""
+Response Cache: reuse agent replies for repeated questions
+- Opt-in per agent (config "response_cache_enabled"); off by default
+- Keyed on model, system prompt hash, normalized user message, a fingerprint of the
+  previous reply and the voice profile, so a hit is only served in the same conversational spot
+- Entries may carry the synthesized audio, in which case a hit skips TTS as well
+- Size-bounded LRU with TTL; hit/miss counters overall and per agent
+"""
+import os
+import re
+import hashlib
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from .cache import TTLCache
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_message(text: str) -> str:
+    """Case, width, punctuation and whitespace insensitive form of a user message"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    """LRU of agent replies shared by all agents that opted in"""
+
+    def __init__(self):
+        self.max_message_chars = int(os.environ.get("RESPONSE_CACHE_MAX_MESSAGE_CHARS", "500"))
+        self._cache = TTLCache(
+            maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", "2048")),
+            ttl=float(os.environ.get("RESPONSE_CACHE_TTL", "3600")),
+        )
+        self._agents: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0})
+
+    @staticmethod
+    def enabled_for(config: Dict[str, Any]) -> bool:
+        return bool(config.get("response_cache_enabled", False))
+
+    def key(self, model: str, system_message: str, message: str, last_reply: Optional[str],
+            voice_profile: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Cache key, or None for messages too long to be worth caching"""
+        normalized = normalize_message(message)
+        if not normalized or len(normalized) > self.max_message_chars:
+            return None
+        context = _digest(normalize_message(last_reply)) if last_reply else ""
+        return (model, _digest(system_message), normalized, context, voice_profile or "")
+
+    def get(self, agent_id: str, key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        self._agents[agent_id]["hits" if entry is not None else "misses"] += 1
+        return dict(entry) if entry is not None else None
+
+    def put(self, agent_id: str, key: Tuple[str, ...], text: str, audio_base64: Optional[str] = None,
+            provider: Optional[str] = None) -> None:
+        self._cache.set(key, {"text": text, "audio_base64": audio_base64, "provider": provider})
+        self._agents[agent_id]["stores"] += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        agents = {}
+        for agent_id, counts in self._agents.items():
+            lookups = counts["hits"] + counts["misses"]
+            agents[agent_id] = {**counts, "hit_rate": round(counts["hits"] / lookups, 4) if lookups else None}
+        return {**self._cache.stats(), "agents": agents}
+
+
+response_cache = ResponseCache()
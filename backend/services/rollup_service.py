@@ -0,0 +1,273 @@
+"""
+Rollup Service: materialized analytics buckets for the dashboard and analytics endpoints
+- Per-hour, per-day and all-time documents in stats_rollups hold conversations, replies,
+  response time, success counts and per-agent stats
+- Updated incrementally (write-behind) as sessions start and agents reply
+- Distinct users are counted exactly via one marker document per (bucket, user) in stats_rollup_users
+- Each flush writes its bucket increments under a flush id, so a retry after a partial failure
+  skips the buckets already applied
+- Reading a 7d/30d range fetches a fixed number of bucket documents by _id
+- The all-time bucket also carries exact platform totals (sessions, agent messages, audio
+  outcomes per provider), seeded once from the transcript collections
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from repositories.indexes import apply_indexes, index
+from .write_behind import FlushIdBuffer, flush_guard
+
+# hour buckets (and their user markers) are only needed for recent charts
+HOUR_RETENTION_DAYS = int(os.environ.get("ROLLUP_HOUR_RETENTION_DAYS", "35"))
+
+ROLLUP_INDEXES = {
+    "stats_rollups": [index(("expires_at", 1), expire_after_seconds=0)],
+    "stats_rollup_users": [index(("expires_at", 1), expire_after_seconds=0)],
+}
+
+COUNTERS = ("conversations", "responses", "successes", "timed_responses", "response_ms_total", "active_users",
+            "agent_messages", "audio_attempts", "audio_successes", "cache_lookups", "cache_hits")
+
+
+def _field(key: str) -> str:
+    # Mongo field names cannot contain "." or start with "$"
+    return key.replace(".", "_").lstrip("$") or "_"
+
+
+def hour_id(at: datetime) -> str:
+    return f"hour:{at:%Y-%m-%dT%H}"
+
+
+def day_id(at: datetime) -> str:
+    return f"day:{at:%Y-%m-%d}"
+
+
+class RollupService(FlushIdBuffer):
+    """Buffers rollup increments and flushes them as one $inc upsert per bucket"""
+
+    def __init__(self, db=None):
+        super().__init__(
+            name="rollups",
+            flush_interval=float(os.environ.get("ROLLUP_FLUSH_INTERVAL", "5")),
+            max_pending=int(os.environ.get("ROLLUP_FLUSH_MAX_PENDING", "1000")),
+        )
+        self.db = None
+        self.rollups = None
+        self.users = None
+        self._inc: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+        self._seen_users: Set[Tuple[str, str]] = set()
+        if db is not None:
+            self.init(db)
+
+    def init(self, db) -> None:
+        """Bind the rollup collections"""
+        self.db = db
+        self.rollups = db["stats_rollups"]
+        self.users = db["stats_rollup_users"]
+
+    async def ensure_indexes(self) -> Dict[str, Any]:
+        return await apply_indexes(self.db, ROLLUP_INDEXES)
+
+    # ---- write path ----
+
+    def _add(self, at: datetime, agent_id: Optional[str], user_id: Optional[str], **counts: float) -> None:
+        for bucket in (hour_id(at), day_id(at), "all"):
+            inc = self._inc[bucket]
+            for name, n in counts.items():
+                inc[name] += n
+                if agent_id:
+                    inc[f"agents.{_field(agent_id)}.{name}"] += n
+            if user_id:
+                self._seen_users.add((bucket, user_id))
+        self._notify()
+
+    def record_conversation(self, agent_id: Optional[str], user_id: Optional[str] = None,
+                            at: Optional[datetime] = None) -> None:
+        """A session started"""
+        self._add(at or datetime.utcnow(), agent_id, user_id, conversations=1)
+
+    def record_response(self, agent_id: Optional[str], user_id: Optional[str], response_ms: float,
+                        success: bool, at: Optional[datetime] = None, cache_hit: Optional[bool] = None) -> None:
+        """An agent turn finished; failed turns count towards the success rate only.
+
+        cache_hit is None unless the agent uses the response cache.
+        """
+        counts = {"responses": 1, "successes": int(success)}
+        if cache_hit is not None:
+            counts["cache_lookups"] = 1
+            counts["cache_hits"] = int(cache_hit)
+        if success:
+            counts["response_ms_total"] = round(response_ms, 1)
+            counts["timed_responses"] = 1
+        self._add(at or datetime.utcnow(), agent_id, user_id, **counts)
+
+    def record_agent_message(self, content: Dict[str, Any], at: Optional[datetime] = None) -> None:
+        """An agent message was logged; counts its audio outcome by provider ("none" when TTS failed)"""
+        counts: Dict[str, float] = {"agent_messages": 1}
+        if "audio_generated" in content:
+            ok = bool(content.get("audio_generated"))
+            provider = _field(content.get("provider_used") or "unknown") if ok else "none"
+            counts.update({"audio_attempts": 1, "audio_successes": int(ok), f"audio_by_provider.{provider}": 1})
+        self._add(at or datetime.utcnow(), None, None, **counts)
+
+    def buffered(self) -> int:
+        return len(self._inc) + len(self._seen_users)
+
+    def _take(self):
+        state = (self._inc, self._seen_users)
+        self._inc = defaultdict(lambda: defaultdict(int))
+        self._seen_users = set()
+        return state
+
+    def _merge(self, state) -> None:
+        inc, seen_users = state
+        for bucket, fields in inc.items():
+            for name, n in fields.items():
+                self._inc[bucket][name] += n
+        self._seen_users |= seen_users
+
+    @staticmethod
+    def _bucket_meta(bucket: str) -> Dict[str, Any]:
+        if bucket == "all":
+            return {"granularity": "all"}
+        granularity, key = bucket.split(":", 1)
+        start = datetime.strptime(key, "%Y-%m-%dT%H" if granularity == "hour" else "%Y-%m-%d")
+        meta: Dict[str, Any] = {"granularity": granularity, "start": start}
+        if granularity == "hour":
+            meta["expires_at"] = start + timedelta(days=HOUR_RETENTION_DAYS)
+        return meta
+
+    @staticmethod
+    def _count_first_sightings(inc, seen_users: Set[Tuple[str, str]], marker_ids) -> None:
+        """Only first sightings count; they are folded into the batch's increments, which a failed
+        bucket write keeps for the retry (the markers are already in place by then)"""
+        for marker_id in marker_ids:
+            bucket, user_id = marker_id.split("|", 1)
+            inc[bucket]["active_users"] += 1
+            seen_users.discard((bucket, user_id))
+
+    async def _write_batch(self, flush_id: str, state) -> None:
+        inc, seen_users = state
+        if seen_users:
+            ops = []
+            for bucket, user_id in seen_users:
+                marker: Dict[str, Any] = {"bucket": bucket, "user_id": user_id}
+                expires_at = self._bucket_meta(bucket).get("expires_at")
+                if expires_at:
+                    marker["expires_at"] = expires_at
+                ops.append(UpdateOne({"_id": f"{bucket}|{user_id}"}, {"$setOnInsert": marker}, upsert=True))
+            try:
+                result = await self.users.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # markers that did land will look like repeat visits to the retry: count them now
+                self._count_first_sightings(inc, seen_users, [u["_id"] for u in e.details.get("upserted", [])])
+                raise
+            self._count_first_sightings(inc, seen_users, result.upserted_ids.values())
+            seen_users.clear()
+
+        not_applied, applied = flush_guard(flush_id)
+        ops = []
+        for bucket, fields in inc.items():
+            if not fields:
+                continue
+            # create the bucket first, so the guarded $inc below needs no upsert
+            ops.append(UpdateOne({"_id": bucket}, {"$setOnInsert": self._bucket_meta(bucket)}, upsert=True))
+            ops.append(UpdateOne({"_id": bucket, **not_applied}, {"$inc": dict(fields), **applied}))
+        if ops:
+            await self.rollups.bulk_write(ops, ordered=True)
+
+    # ---- read path ----
+
+    async def get_buckets(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Bucket documents in the order of `ids`; missing buckets come back zeroed"""
+        found = {doc["_id"]: doc async for doc in self.rollups.find({"_id": {"$in": ids}}, {"flush_ids": 0})}
+        return [found.get(i) or {"_id": i, **{c: 0 for c in COUNTERS}} for i in ids]
+
+    async def day_buckets(self, days: int, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """The last `days` day buckets up to and including `end` (today), oldest first"""
+        end = end or datetime.utcnow()
+        return await self.get_buckets([day_id(end - timedelta(days=d)) for d in range(days - 1, -1, -1)])
+
+    async def hour_buckets(self, hours: int, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        end = end or datetime.utcnow()
+        return await self.get_buckets([hour_id(end - timedelta(hours=h)) for h in range(hours - 1, -1, -1)])
+
+    async def totals(self) -> Dict[str, Any]:
+        return (await self.get_buckets(["all"]))[0]
+
+    async def live_totals(self) -> Dict[str, Any]:
+        """All-time totals including this process's increments that are not flushed yet"""
+        totals = await self.totals()
+        for name, n in self._inc.get("all", {}).items():
+            *parents, leaf = name.split(".")
+            target = totals
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = target.get(leaf, 0) + n
+        return totals
+
+    async def seed_totals(self, sessions, messages) -> bool:
+        """Initialize all-time totals from the session collections once; returns True if it seeded.
+
+        Run at startup, before this process records anything. The filter on
+        `seeded` makes concurrent seeders from other processes a no-op.
+        """
+        if await self.rollups.find_one({"_id": "all", "seeded": True}, {"_id": 1}):
+            return False
+        audio_outcomes = messages.aggregate([
+            {"$match": {"role": "agent", "content.audio_generated": {"$exists": True}}},
+            {"$group": {
+                "_id": {"$cond": ["$content.audio_generated", {"$ifNull": ["$content.provider_used", "unknown"]}, "none"]},
+                "n": {"$sum": 1},
+            }},
+        ])
+        by_provider = {_field(str(doc["_id"])): doc["n"] async for doc in audio_outcomes}
+        totals = {
+            "conversations": await sessions.count_documents({}),
+            "agent_messages": await messages.count_documents({"role": "agent"}),
+            "audio_attempts": sum(by_provider.values()),
+            "audio_successes": sum(n for p, n in by_provider.items() if p != "none"),
+            "audio_by_provider": by_provider,
+            "seeded": True,
+        }
+        try:
+            await self.rollups.update_one(
+                {"_id": "all", "seeded": {"$ne": True}},
+                {"$set": totals, "$setOnInsert": {"granularity": "all"}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # another process seeded first
+        return True
+
+    @staticmethod
+    def summarize(buckets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sum counters over buckets, overall and per agent"""
+        total: Dict[str, float] = defaultdict(int)
+        agents: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+        for b in buckets:
+            for name in COUNTERS:
+                total[name] += b.get(name, 0)
+            for agent_id, stats in (b.get("agents") or {}).items():
+                for name, n in stats.items():
+                    agents[agent_id][name] += n
+        return {"total": dict(total), "agents": {a: dict(s) for a, s in agents.items()}}
+
+    @staticmethod
+    def rates(stats: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """Success rate (%), average response time (s) and response cache hit rate (%) of a counter set"""
+        responses = stats.get("responses", 0)
+        timed = stats.get("timed_responses", 0)
+        lookups = stats.get("cache_lookups", 0)
+        return {
+            "successRate": round(100 * stats.get("successes", 0) / responses, 1) if responses else None,
+            "avgResponseTime": round(stats.get("response_ms_total", 0) / timed / 1000, 2) if timed else None,
+            "cacheHitRate": round(100 * stats.get("cache_hits", 0) / lookups, 1) if lookups else None,
+        }
+
+
+rollup_service = RollupService()
@@ -1,20 +1,71 @@
 """
 Session Service: Manages conversation sessions and transcripts in MongoDB (UUID IDs)
+- Messages are written behind in batches by TranscriptWriter
+- TRANSCRIPT_DURABILITY=flush makes add_message wait until its message is persisted
+- Session listing uses keyset pagination over (updated_at, _id) backed by compound indexes
 """
 import os
+import json
 import uuid
+import base64
+import logging
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Dict, Any, List, Optional, AsyncIterator
+from repositories.indexes import QueryShape, apply_indexes, explain_audit, index
+
+from .cache import TTLCache
+from .rollup_service import rollup_service
+from .transcript_writer import TranscriptWriter
+
+logger = logging.getLogger(__name__)
+
+SESSION_INDEXES = {
+    "agent_sessions": [
+        index(("agent_id", 1), ("updated_at", -1), ("_id", -1), name="agent_updated"),
+        index(("user_id", 1), ("updated_at", -1), ("_id", -1), name="user_updated"),
+        index(("updated_at", -1), ("_id", -1), name="updated"),
+    ],
+    "agent_messages": [
+        index(("session_id", 1), ("timestamp", 1), name="session_timestamp"),
+    ],
+}
+
+SESSION_QUERY_SHAPES = [
+    QueryShape("agent_sessions", "list_sessions(agent_id)", {"agent_id": "audit"}, [("updated_at", -1), ("_id", -1)], 50),
+    QueryShape("agent_sessions", "list_sessions(user_id)", {"user_id": "audit"}, [("updated_at", -1), ("_id", -1)], 50),
+    QueryShape("agent_sessions", "list_sessions", {}, [("updated_at", -1), ("_id", -1)], 50),
+    QueryShape("agent_messages", "export_session / iter_messages", {"session_id": "audit"}, [("timestamp", 1)]),
+]
+
+# flush ids are TranscriptWriter bookkeeping, not part of a session
+SESSION_PROJECTION = {"flush_ids": 0}
 
 class SessionService:
-    def __init__(self):
-        mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-        db_name = os.environ.get("DB_NAME", "aiimpact_platform")
-        self.client = AsyncIOMotorClient(mongo_url)
-        self.db = self.client[db_name]
-        self.sessions = self.db["agent_sessions"]
-        self.messages = self.db["agent_messages"]
+    def __init__(self, db=None):
+        self.db = None
+        self.sessions = None
+        self.messages = None
+        self.writer: Optional[TranscriptWriter] = None
+        # "buffered" returns as soon as the message is queued; "flush" waits for the write
+        self.durable = os.environ.get("TRANSCRIPT_DURABILITY", "buffered").lower() == "flush"
+        # (session_id, agent_id) pairs known to exist; sessions are never deleted, so no TTL
+        self._known_sessions = TTLCache(maxsize=int(os.environ.get("SESSION_CACHE_SIZE", "10000")), ttl=None)
+        if db is not None:
+            self.init(db)
+
+    def init(self, db) -> None:
+        """Bind the session and message collections (and the transcript writer)"""
+        self.db = db
+        self.sessions = db["agent_sessions"]
+        self.messages = db["agent_messages"]
+        self.writer = TranscriptWriter(self.messages, self.sessions)
+
+    async def ensure_indexes(self, drop_unmanaged: bool = False, rebuild_conflicts: bool = False) -> Dict[str, Any]:
+        """Apply SESSION_INDEXES idempotently and return the per-collection diff"""
+        return await apply_indexes(self.db, SESSION_INDEXES, drop_unmanaged, rebuild_conflicts)
+
+    async def explain_audit(self) -> List[Dict[str, Any]]:
+        return await explain_audit(self.db, SESSION_QUERY_SHAPES)
 
     async def create_session(self, agent_id: str, user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
         sid = str(uuid.uuid4())
@@ -28,16 +79,22 @@ class SessionService:
             "message_count": 0,
         }
         await self.sessions.insert_one(doc)
+        self._known_sessions.set((sid, agent_id), True)
+        rollup_service.record_conversation(agent_id, user_id)
         return sid
 
     async def ensure_session(self, session_id: Optional[str], agent_id: str, user_id: Optional[str]) -> str:
         if session_id:
-            found = await self.sessions.find_one({"_id": session_id, "agent_id": agent_id})
+            if self._known_sessions.get((session_id, agent_id)):
+                return session_id
+            found = await self.sessions.find_one({"_id": session_id, "agent_id": agent_id}, {"_id": 1})
             if found:
+                self._known_sessions.set((session_id, agent_id), True)
                 return session_id
         return await self.create_session(agent_id=agent_id, user_id=user_id)
 
-    async def add_message(self, session_id: str, role: str, content: Dict[str, Any]):
+    async def add_message(self, session_id: str, role: str, content: Dict[str, Any], wait: Optional[bool] = None):
+        """Queue a transcript message; wait=True (or durable mode) returns only once it is persisted"""
         mid = str(uuid.uuid4())
         msg = {
             "_id": mid,
@@ -46,36 +103,92 @@ class SessionService:
             "content": content,
             "timestamp": datetime.utcnow().isoformat(),
         }
-        await self.messages.insert_one(msg)
-        await self.sessions.update_one({"_id": session_id}, {"$inc": {"message_count": 1}, "$set": {"updated_at": datetime.utcnow().isoformat()}})
+        self.writer.append(msg)
+        if role == "agent":
+            rollup_service.record_agent_message(content)
+        durable = self.durable if wait is None else wait
+        if durable:
+            await self.writer.flush()
+
+    async def flush(self) -> None:
+        """Persist buffered messages so subsequent reads see them"""
+        await self.writer.flush()
+
+    async def _read_barrier(self) -> None:
+        # reads in this process should see queued messages; a failed flush is retried later
+        try:
+            await self.writer.flush()
+        except Exception as e:
+            logger.warning(f"Transcript flush before read failed: {e}")
+
+    async def close(self) -> None:
+        await self.writer.close()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._known_sessions.stats()
 
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        return await self.sessions.find_one({"_id": session_id})
+        await self._read_barrier()
+        return await self.sessions.find_one({"_id": session_id}, SESSION_PROJECTION)
 
-    async def list_sessions(self, agent_id: Optional[str] = None, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    async def list_sessions(self, agent_id: Optional[str] = None, user_id: Optional[str] = None, limit: int = 50, after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sessions newest-first; pass the previous page's cursor as `after` for the next page.
+
+        Sessions touched while paging move to the front, so a concurrent update
+        can make a session show up on an earlier page than expected.
+        """
         q: Dict[str, Any] = {}
         if agent_id:
             q["agent_id"] = agent_id
         if user_id:
             q["user_id"] = user_id
-        cursor = self.sessions.find(q).sort("updated_at", -1).limit(limit)
+        if after:
+            updated_at, last_id = self.decode_cursor(after)
+            q["$or"] = [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": last_id}},
+            ]
+        await self._read_barrier()
+        cursor = self.sessions.find(q, SESSION_PROJECTION).sort([("updated_at", -1), ("_id", -1)]).limit(limit)
         out: List[Dict[str, Any]] = []
         async for s in cursor:
             out.append(s)
         return out
 
+    @staticmethod
+    def encode_cursor(session: Dict[str, Any]) -> str:
+        raw = json.dumps([session.get("updated_at"), session["_id"]]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(token: str):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            updated_at, last_id = json.loads(base64.urlsafe_b64decode(padded))
+            return updated_at, last_id
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+
     async def export_session(self, session_id: str) -> Dict[str, Any]:
         sess = await self.get_session(session_id)
         if not sess:
             return {"error": "Session not found"}
-        cursor = self.messages.find({"session_id": session_id}).sort("timestamp", 1)
         msgs: List[Dict[str, Any]] = []
+        async for m in self.iter_messages(session_id):
+            msgs.append(m)
+        return {"session": sess, "messages": msgs}
+
+    async def iter_messages(self, session_id: str, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a session's messages in order, fetching batch_size documents per round-trip"""
+        cursor = self.messages.find(
+            {"session_id": session_id},
+            {"_id": 0, "role": 1, "timestamp": 1, "content": 1},
+        ).sort("timestamp", 1).batch_size(batch_size)
         async for m in cursor:
-            msgs.append({
+            yield {
                 "role": m.get("role"),
                 "timestamp": m.get("timestamp"),
                 "content": m.get("content", {}),
-            })
-        return {"session": sess, "messages": msgs}
+            }
 
 session_service = SessionService()
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Single-flight request coalescing for provider calls
+- Concurrent calls with the same key await one in-flight execution and share its result or error
+- A caller that is cancelled only stops waiting; the call itself is cancelled once no caller is left
+- Nothing is cached: a call that has finished is not reused by later callers
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent identical async calls"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() unless a call with the same key is in flight, in which case join it"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        call.waiters += 1
+        try:
+            # shield: cancelling one waiter must not cancel the call the others are waiting on
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # every caller gave up; stop the provider call and let the next caller start afresh
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+                self.cancelled += 1
+
+    def _finished(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled() and call.task.exception() is not None:
+            self.errors += 1  # raised to every waiter; counted once
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / calls, 4) if calls else None,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,71 @@
+"""
+Transcript Writer: write-behind persistence for SessionService messages
+- Groups buffered messages into one insert_many per flush
+- Merges session counter updates into one $inc per session per flush, guarded by the
+  flush id so a retried batch does not count a session's messages twice
+"""
+import os
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .write_behind import FlushIdBuffer, flush_guard
+
+DUPLICATE_KEY = 11000
+
+
+class TranscriptWriter(FlushIdBuffer):
+    """Buffers transcript messages and session counters between flushes"""
+
+    def __init__(self, messages: Any, sessions: Any):
+        super().__init__(
+            name="transcript-writer",
+            flush_interval=float(os.environ.get("TRANSCRIPT_FLUSH_INTERVAL", "0.5")),
+            max_pending=int(os.environ.get("TRANSCRIPT_FLUSH_MAX_BATCH", "500")),
+        )
+        self.messages = messages
+        self.sessions = sessions
+        self._pending_messages: List[Dict[str, Any]] = []
+        # session_id -> [message count, latest updated_at]
+        self._session_counters: Dict[str, list] = {}
+
+    def append(self, message: Dict[str, Any]) -> None:
+        self._pending_messages.append(message)
+        counter = self._session_counters.setdefault(message["session_id"], [0, message["timestamp"]])
+        counter[0] += 1
+        counter[1] = max(counter[1], message["timestamp"])
+        self._notify()
+
+    def buffered(self) -> int:
+        return len(self._pending_messages)
+
+    def _take(self):
+        state = (self._pending_messages, self._session_counters)
+        self._pending_messages = []
+        self._session_counters = {}
+        return state
+
+    def _merge(self, state) -> None:
+        messages, counters = state
+        self._pending_messages[:0] = messages
+        for session_id, (count, updated_at) in counters.items():
+            counter = self._session_counters.setdefault(session_id, [0, updated_at])
+            counter[0] += count
+            counter[1] = max(counter[1], updated_at)
+
+    async def _write_batch(self, flush_id: str, state) -> None:
+        messages, counters = state
+        try:
+            await self.messages.insert_many(messages, ordered=False)
+        except BulkWriteError as e:
+            # messages carry their own UUIDs, so a retried batch may hit ones that already landed
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+        not_applied, applied = flush_guard(flush_id)
+        ops = [
+            UpdateOne({"_id": session_id, **not_applied},
+                      {"$inc": {"message_count": count}, "$max": {"updated_at": updated_at}, **applied})
+            for session_id, (count, updated_at) in counters.items()
+        ]
+        await self.sessions.bulk_write(ops, ordered=False)
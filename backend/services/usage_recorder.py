@@ -0,0 +1,98 @@
+"""
+Usage Recorder: write-behind API usage accounting for AccessService
+- Counts requests in memory per (key, day, endpoint)
+- Flushes with one bulk_write per collection (api_usage, api_keys)
+- Each flush carries an id recorded on the documents it updates, so retrying a failed
+  or partly applied flush does not count anything twice
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from pymongo import UpdateOne
+
+from .write_behind import FlushIdBuffer, flush_guard
+
+
+def _field(endpoint: str) -> str:
+    # Mongo field names cannot contain "." or start with "$"
+    return endpoint.replace(".", "_").lstrip("$") or "_"
+
+
+class UsageRecorder(FlushIdBuffer):
+    """Buffers per-request usage increments and flushes them in batches"""
+
+    def __init__(self, keys: Any, usage: Any):
+        super().__init__(
+            name="usage-recorder",
+            flush_interval=float(os.environ.get("USAGE_FLUSH_INTERVAL", "5")),
+            max_pending=int(os.environ.get("USAGE_FLUSH_MAX_PENDING", "1000")),
+        )
+        self.keys = keys
+        self.usage = usage
+        self._counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self._last_used: Dict[str, str] = {}
+        self._last_endpoint: Dict[Tuple[str, str], str] = {}
+
+    def record(self, key_id: str, endpoint: str) -> None:
+        now = datetime.utcnow()
+        day = now.strftime("%Y-%m-%d")
+        self._counts[(key_id, day, endpoint)] += 1
+        self._last_used[key_id] = now.isoformat()
+        self._last_endpoint[(key_id, day)] = endpoint
+        self._notify()
+
+    def buffered(self) -> int:
+        return len(self._counts)
+
+    def _take(self):
+        state = (self._counts, self._last_used, self._last_endpoint)
+        self._counts = defaultdict(int)
+        self._last_used = {}
+        self._last_endpoint = {}
+        return state
+
+    def _merge(self, state) -> None:
+        counts, last_used, last_endpoint = state
+        for k, n in counts.items():
+            self._counts[k] += n
+        for key_id, ts in last_used.items():
+            self._last_used[key_id] = max(ts, self._last_used.get(key_id, ts))
+        for k, endpoint in last_endpoint.items():
+            self._last_endpoint.setdefault(k, endpoint)
+
+    async def _write_batch(self, flush_id: str, state) -> None:
+        counts, last_used, last_endpoint = state
+        now_iso = datetime.utcnow().isoformat()
+        per_day: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(dict)
+        per_key: Dict[str, int] = defaultdict(int)
+        for (key_id, day, endpoint), n in counts.items():
+            per_day[(key_id, day)][endpoint] = n
+            per_key[key_id] += n
+        not_applied, applied = flush_guard(flush_id)
+
+        usage_ops = []
+        for (key_id, day), endpoints in per_day.items():
+            inc = {"count": sum(endpoints.values())}
+            for endpoint, n in endpoints.items():
+                inc[f"endpoints.{_field(endpoint)}"] = n
+            # create the day document first, so the counting update below needs no upsert
+            usage_ops.append(UpdateOne(
+                {"_id": f"{key_id}:{day}"},
+                {"$setOnInsert": {"key_id": key_id, "day": day, "created_at": now_iso}},
+                upsert=True,
+            ))
+            usage_ops.append(UpdateOne(
+                {"_id": f"{key_id}:{day}", **not_applied},
+                {"$inc": inc, "$set": {"last_endpoint": last_endpoint[(key_id, day)]}, **applied},
+            ))
+        key_ops = [
+            UpdateOne(
+                {"_id": key_id, **not_applied},
+                {"$inc": {"usage_total": n}, "$max": {"last_used_at": last_used[key_id]}, **applied},
+            )
+            for key_id, n in per_key.items()
+        ]
+        await self.usage.bulk_write(usage_ops, ordered=True)
+        await self.keys.bulk_write(key_ops, ordered=False)
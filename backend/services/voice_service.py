@@ -5,15 +5,27 @@ Handles Text-to-Speech using Azure (primary) with ElevenLabs fallback, and Speec
 import os
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-import azure.cognitiveservices.speech as speechsdk
-from elevenlabs.client import ElevenLabs
+import threading
+from typing import Dict, List, Optional, Any, Tuple
 import tempfile
 import base64
 from io import BytesIO
 
+from .single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
+_speechsdk = None
+
+
+def _load_speechsdk():
+    """Import the Azure Speech SDK on first use; it is slow to load and not needed to start serving"""
+    global _speechsdk
+    if _speechsdk is None:
+        import azure.cognitiveservices.speech as speechsdk
+        _speechsdk = speechsdk
+    return _speechsdk
+
 class VoiceService:
     """Voice service for TTS and STT operations"""
     
@@ -22,29 +34,16 @@ class VoiceService:
         self.azure_speech_key = os.getenv("AZURE_SPEECH_KEY")
         self.azure_region = os.getenv("AZURE_SPEECH_REGION", "eastus")
         self.last_provider: Optional[str] = None
+        # provider clients are created on first use (or by warm_up), not at import
+        self._init_lock = threading.Lock()
+        self._elevenlabs_client = None
+        self._speech_config = None
+        self._initialized = set()
+        self.tts_calls = SingleFlight("tts")
         
-        # Initialize ElevenLabs client
-        if self.elevenlabs_api_key:
-            self.elevenlabs_client = ElevenLabs(api_key=self.elevenlabs_api_key)
-        else:
-            self.elevenlabs_client = None
+        if not self.elevenlabs_api_key:
             logger.warning("ElevenLabs API key not found. TTS fallback to Azure only.")
-        
-        # Initialize Azure Speech config (for STT and TTS)
-        if self.azure_speech_key:
-            self.speech_config = speechsdk.SpeechConfig(
-                subscription=self.azure_speech_key,
-                region=self.azure_region
-            )
-            try:
-                # Prefer MP3 output for browser compatibility
-                self.speech_config.set_speech_synthesis_output_format(
-                    speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
-                )
-            except Exception:
-                pass
-        else:
-            self.speech_config = None
+        if not self.azure_speech_key:
             logger.warning("Azure Speech key not found. STT/TTS will be limited.")
         
         # Voice configurations - ElevenLabs IDs
@@ -67,6 +66,62 @@ class VoiceService:
             "technical_expert": "en-US-GuyNeural",
         }
     
+    @property
+    def elevenlabs_client(self):
+        if "elevenlabs" not in self._initialized:
+            with self._init_lock:
+                if "elevenlabs" not in self._initialized:
+                    if self.elevenlabs_api_key:
+                        try:
+                            from elevenlabs.client import ElevenLabs
+                            from .http_clients import provider_http_client
+                            self._elevenlabs_client = ElevenLabs(
+                                api_key=self.elevenlabs_api_key, httpx_client=provider_http_client()
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to initialize ElevenLabs client: {e}")
+                    self._initialized.add("elevenlabs")
+        return self._elevenlabs_client
+    
+    @property
+    def speech_config(self):
+        if "azure" not in self._initialized:
+            with self._init_lock:
+                if "azure" not in self._initialized:
+                    if self.azure_speech_key:
+                        try:
+                            self._speech_config = self._create_speech_config()
+                        except Exception as e:
+                            logger.error(f"Failed to initialize Azure Speech config: {e}")
+                    self._initialized.add("azure")
+        return self._speech_config
+    
+    def _create_speech_config(self):
+        speechsdk = _load_speechsdk()
+        config = speechsdk.SpeechConfig(subscription=self.azure_speech_key, region=self.azure_region)
+        try:
+            # Prefer MP3 output for browser compatibility
+            config.set_speech_synthesis_output_format(
+                speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
+            )
+        except Exception:
+            pass
+        return config
+    
+    async def warm_up(self, connect: bool = False) -> Optional[str]:
+        """Load the SDKs and build provider clients off the event loop.
+
+        With connect=True also opens the ElevenLabs connection (Azure synthesizers
+        connect per request, so there is nothing to keep open there).
+        """
+        speech_config, elevenlabs_client = await asyncio.to_thread(
+            lambda: (self.speech_config, self.elevenlabs_client)
+        )
+        providers = [name for name, ready in (("azure", speech_config), ("elevenlabs", elevenlabs_client)) if ready]
+        if connect and elevenlabs_client is not None:
+            await asyncio.to_thread(elevenlabs_client.voices.get_all)
+        return ", ".join(providers) or "not configured"
+    
     async def text_to_speech(
         self, 
         text: str,
@@ -77,11 +132,32 @@ class VoiceService:
         Priority: Azure → ElevenLabs → None (text-only).
         Sets self.last_provider accordingly.
         """
-        self.last_provider = None
-        
+        audio_base64, self.last_provider = await self.synthesize(text, voice_id=voice_id, voice_profile=voice_profile)
+        return audio_base64
+    
+    async def synthesize(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        voice_profile: str = "professional_female"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Like text_to_speech, returning (base64 audio, provider) instead of setting last_provider.
+
+        Concurrent calls for the same text and voice share one synthesis.
+        """
+        key = (text, voice_id, voice_profile)
+        return await self.tts_calls.do(key, lambda: self._synthesize(text, voice_id, voice_profile))
+    
+    async def _synthesize(
+        self,
+        text: str,
+        voice_id: Optional[str],
+        voice_profile: str
+    ) -> Tuple[Optional[str], Optional[str]]:
         # 1) Azure (primary)
         if self.speech_config:
             try:
+                speechsdk = _load_speechsdk()
                 azure_voice = self.azure_voices.get(voice_profile, "en-US-JennyNeural")
                 self.speech_config.speech_synthesis_voice_name = azure_voice
                 audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=False)
@@ -103,8 +179,7 @@ class VoiceService:
                         except Exception:
                             audio_bytes = b""
                     if audio_bytes:
-                        self.last_provider = "azure"
-                        return base64.b64encode(audio_bytes).decode()
+                        return base64.b64encode(audio_bytes).decode(), "azure"
                     else:
                         logger.error("Azure TTS produced empty audio bytes")
                 else:
@@ -119,14 +194,14 @@ class VoiceService:
             try:
                 if not voice_id:
                     voice_id = self.voice_profiles.get(voice_profile, self.voice_profiles["professional_female"])
-                audio = self.elevenlabs_client.text_to_speech.convert(
+                client = self.elevenlabs_client
+                # the SDK call and reading its audio iterator block; keep them off the event loop
+                audio_bytes = await asyncio.to_thread(lambda: b"".join(client.text_to_speech.convert(
                     text=text,
                     voice_id=voice_id,
                     model_id="eleven_monolingual_v1"
-                )
-                audio_bytes = b"".join(audio)
-                self.last_provider = "elevenlabs"
-                return base64.b64encode(audio_bytes).decode()
+                )))
+                return base64.b64encode(audio_bytes).decode(), "elevenlabs"
             except Exception as e:
                 logger.warning(f"ElevenLabs TTS failed, will return text-only: {e}")
         else:
@@ -134,7 +209,7 @@ class VoiceService:
         
         # 3) None available → text-only mode
         logger.warning("All TTS providers unavailable; returning None for text-only fallback")
-        return None
+        return None, None
     
     async def speech_to_text(
         self, 
@@ -147,6 +222,7 @@ class VoiceService:
             raise ValueError("Azure Speech config not initialized")
         
         try:
+            speechsdk = _load_speechsdk()
             self.speech_config.speech_recognition_language = language
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
                 temp_file.write(audio_data)
@@ -197,9 +273,10 @@ class VoiceService:
             logger.error(f"Voice cloning failed: {e}")
             return {"success": False, "error": str(e)}
     
-    def _extract_confidence(self, result: speechsdk.SpeechRecognitionResult) -> float:
+    def _extract_confidence(self, result: Any) -> float:
         try:
             import json
+            speechsdk = _load_speechsdk()
             json_result = result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult)
             if json_result:
                 parsed_result = json.loads(json_result)
@@ -0,0 +1,73 @@
+"""
+Warm-up Service: gets connections, indexes and caches ready before the server takes traffic
+- Steps run concurrently; each is timed and bounded by WARMUP_STEP_TIMEOUT
+- A failed or slow step is logged and reported but does not stop startup
+- The report (status and duration per step) is served by /ready and logged at startup
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[], Awaitable[Any]]
+
+
+class WarmupService:
+    """Runs named warm-up steps and keeps their outcome"""
+
+    def __init__(self):
+        self.step_timeout = float(os.environ.get("WARMUP_STEP_TIMEOUT", "20"))
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[datetime] = None
+        self.duration_ms: Optional[float] = None
+        self.done = False
+
+    async def timed(self, name: str, step: Step) -> Any:
+        """Run one step, recording its status and duration; returns its result or None on failure"""
+        started = time.perf_counter()
+        entry: Dict[str, Any] = {"status": "running"}
+        self.steps[name] = entry
+        result = None
+        try:
+            result = await asyncio.wait_for(step(), timeout=self.step_timeout)
+            entry["status"] = "ok"
+            if result is not None:
+                entry["detail"] = result if isinstance(result, (str, int, float, bool)) else str(result)
+        except asyncio.CancelledError:
+            entry["status"] = "cancelled"  # a sub-step whose parent step timed out
+            raise
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            logger.warning(f"Warm-up step {name} failed: {entry['error']}")
+        finally:
+            entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def run(self, steps: Dict[str, Step]) -> Dict[str, Any]:
+        """Run top-level steps concurrently; steps may call timed() for their own sub-steps"""
+        self.started_at = datetime.utcnow()
+        started = time.perf_counter()
+        await asyncio.gather(*(self.timed(name, step) for name, step in steps.items()))
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.done = True
+        failed = [name for name, entry in self.steps.items() if entry["status"] != "ok"]
+        timings = ", ".join(f"{name}={entry['duration_ms']:.0f}ms" for name, entry in self.steps.items())
+        logger.info(f"Warm-up finished in {self.duration_ms:.0f} ms ({timings})"
+                    + (f"; failed: {', '.join(failed)}" if failed else ""))
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "done": self.done,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "steps": {name: dict(entry) for name, entry in self.steps.items()},
+        }
+
+
+warmup_service = WarmupService()
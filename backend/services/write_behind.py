@@ -0,0 +1,174 @@
+"""
+Write-behind buffering for Universal Agent Platform services
+- Callers record into memory without awaiting the database
+- A background task flushes on an interval or as soon as a size threshold is hit
+- Failed flushes are merged back so the next flush retries them
+- FlushIdBuffer is for $inc-style writes: a failed batch is retried as is under its flush id,
+  and documents already carrying that id are skipped, so a partial write is never counted twice
+"""
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# flush ids remembered per document; only the last failed flush is ever retried
+FLUSH_IDS_KEPT = 8
+
+
+def flush_guard(flush_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Filter and update clauses that apply an update at most once per flush id"""
+    return ({"flush_ids": {"$ne": flush_id}},
+            {"$push": {"flush_ids": {"$each": [flush_id], "$slice": -FLUSH_IDS_KEPT}}})
+
+
+class WriteBehindBuffer:
+    """Base class for in-memory buffers flushed to MongoDB in batches.
+
+    Subclasses implement ``pending``, ``_drain`` (take and reset the buffered
+    state), ``_write`` (persist a drained batch) and ``_restore`` (merge a
+    batch back after a failed write).
+    """
+
+    def __init__(self, name: str, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.name = name
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def pending(self) -> int:
+        raise NotImplementedError
+
+    def _drain(self) -> Any:
+        raise NotImplementedError
+
+    async def _write(self, batch: Any) -> None:
+        raise NotImplementedError
+
+    def _restore(self, batch: Any) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Start the background flusher if it is not running yet"""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._closed = False
+        self._task = loop.create_task(self._run(), name=f"write-behind:{self.name}")
+
+    def _notify(self) -> None:
+        """Called by subclasses after buffering something"""
+        if self._closed:
+            return
+        self.start()
+        if self.pending() >= self.max_pending:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        """Persist everything buffered so far; re-raises write errors"""
+        async with self._flush_lock:
+            if not self.pending():
+                return
+            batch = self._drain()
+            try:
+                await self._write(batch)
+                self.flushes += 1
+            except Exception:
+                self.flush_errors += 1
+                self._restore(batch)
+                raise
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} flush failed, will retry: {e}")
+
+    async def close(self) -> None:
+        """Stop the background flusher and flush what is still pending"""
+        self._closed = True
+        if self._task is not None:
+            # let an in-flight flush finish rather than cancelling it mid-write
+            self._wake.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"{self.name} final flush failed, {self.pending()} pending items lost: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+class FlushIdBuffer(WriteBehindBuffer):
+    """Write-behind buffer whose batches are written under a flush id.
+
+    Subclasses implement ``buffered`` (count of buffered items), ``_take``
+    (take and reset the buffered state), ``_merge`` (merge state that never
+    reached Mongo back in) and ``_write_batch`` (persist state, guarding each
+    non-idempotent update with ``flush_guard(flush_id)``).
+    """
+
+    def __init__(self, name: str, flush_interval: float = 5.0, max_pending: int = 1000):
+        super().__init__(name, flush_interval, max_pending)
+        self._retry: Optional[Tuple[str, Any]] = None  # a failed batch, kept with its flush id
+        self._attempting: Optional[Tuple[str, Any]] = None
+
+    def buffered(self) -> int:
+        raise NotImplementedError
+
+    def _take(self) -> Any:
+        raise NotImplementedError
+
+    def _merge(self, state: Any) -> None:
+        raise NotImplementedError
+
+    async def _write_batch(self, flush_id: str, state: Any) -> None:
+        raise NotImplementedError
+
+    def pending(self) -> int:
+        return self.buffered() + (self._retry is not None)
+
+    def _drain(self):
+        parts = [self._retry] if self._retry is not None else []
+        if self.buffered():
+            parts.append((uuid.uuid4().hex, self._take()))
+        self._retry = None
+        return parts
+
+    def _restore(self, batch) -> None:
+        # the part that failed may be partly applied: retry it as is, under the same flush id
+        failed, self._attempting = self._attempting, None
+        self._retry = failed
+        # parts after it never reached Mongo and can be merged with what was buffered since
+        start = next((i + 1 for i, part in enumerate(batch) if part is failed), 0)
+        for _, state in batch[start:]:
+            self._merge(state)
+
+    async def _write(self, batch) -> None:
+        for part in batch:
+            self._attempting = part
+            await self._write_batch(*part)
+        self._attempting = None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the backend is not a package: its modules import each other as top-level names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
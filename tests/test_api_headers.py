@@ -0,0 +1,95 @@
+"""
+Headers on routes guarded by require_api_key
+- Rate-limit headers set by the dependency reach routes that build their own ORJSONResponse
+- Raw Mongo documents (ObjectId _id) serialize, and X-Next-Cursor is kept alongside
+"""
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api import agents, tasks, workflows  # noqa: E402
+from api.responses import ORJSONResponse  # noqa: E402
+from middleware.auth import require_api_key  # noqa: E402
+from repositories.mongodb_repository import mongodb_repository  # noqa: E402
+from services.access_service import access_service  # noqa: E402
+from services.rate_limiter import InProcessRateLimiter  # noqa: E402
+
+KEY = {"_id": "key-1", "rate_limit_per_minute": 60, "rate_limit_burst": 3}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def enforced():
+        return True
+
+    async def verify(provided):
+        return KEY if provided == "secret" else None
+
+    monkeypatch.setattr(access_service, "is_enforced", enforced)
+    monkeypatch.setattr(access_service, "verify_api_key", verify)
+    monkeypatch.setattr(access_service, "record_usage", lambda doc, endpoint: None)
+    monkeypatch.setattr(access_service, "rate_limiter", InProcessRateLimiter())
+
+    db = mongomock_motor.AsyncMongoMockClient()["api_headers_test"]
+
+    async def seed():
+        assert await mongodb_repository.connect(db)
+        await db.agents.insert_many([{"agent_id": f"a{i}", "status": "active"} for i in range(3)])
+        await db.workflows.insert_one({"workflow_id": "w1", "name": "flow"})
+        await db.tasks.insert_one({"task_id": "t1", "title": "task"})
+
+    asyncio.run(seed())
+    mongodb_repository.invalidate_cached("agents")
+    mongodb_repository.invalidate_cached("workflows")
+
+    app = FastAPI(default_response_class=ORJSONResponse)
+    for module in (agents, workflows, tasks):
+        app.include_router(module.router, dependencies=[Depends(require_api_key)])
+    yield TestClient(app, headers={"x-api-key": "secret"})
+    asyncio.run(mongodb_repository.disconnect())
+
+
+def _assert_rate_headers(response, remaining):
+    assert response.headers["x-ratelimit-limit"] == "3"
+    assert response.headers["x-ratelimit-remaining"] == str(remaining)
+    assert int(response.headers["x-ratelimit-reset"]) >= 1
+
+
+def test_list_route_keeps_rate_limit_and_cursor_headers(client):
+    response = client.get("/api/agents", params={"limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 2 and all(isinstance(agent["_id"], str) for agent in body)
+    assert response.headers["x-next-cursor"] == body[-1]["_id"]
+    _assert_rate_headers(response, remaining=2)
+
+
+def test_get_routes_keep_rate_limit_headers(client):
+    workflow = client.get("/api/workflows/w1")
+    assert workflow.status_code == 200 and workflow.json()["workflow_id"] == "w1"
+    _assert_rate_headers(workflow, remaining=2)
+
+    task = client.get("/api/tasks/t1")
+    assert task.status_code == 200 and task.json()["task_id"] == "t1"
+    _assert_rate_headers(task, remaining=1)
+    assert "x-next-cursor" not in task.headers
+
+
+def test_exhausted_burst_is_rejected_with_retry_after(client):
+    for remaining in (2, 1, 0):
+        _assert_rate_headers(client.get("/api/tasks/t1"), remaining)
+    rejected = client.get("/api/tasks/t1")
+    assert rejected.status_code == 429
+    assert rejected.headers["x-ratelimit-remaining"] == "0"
+    assert int(rejected.headers["retry-after"]) >= 1
+
+
+def test_missing_key_is_rejected(client):
+    response = client.get("/api/agents", headers={"x-api-key": "wrong"})
+    assert response.status_code == 401
+    assert "x-ratelimit-limit" not in response.headers
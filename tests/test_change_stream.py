@@ -0,0 +1,112 @@
+"""
+ChangeStreamInvalidator: change events evict MongoDBRepository's read-through cache
+"""
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from repositories.change_stream import ChangeStreamInvalidator  # noqa: E402
+from repositories.mongodb_repository import CACHED_COLLECTIONS, MongoDBRepository  # noqa: E402
+
+
+async def _repository():
+    db = mongomock_motor.AsyncMongoMockClient()["change_stream_test"]
+    repo = MongoDBRepository()
+    assert await repo.connect(db)
+    await db.agents.insert_many([
+        {"agent_id": "a1", "name": "first", "status": "active"},
+        {"agent_id": "a2", "name": "second", "status": "active"},
+    ])
+    await db.workflows.insert_one({"workflow_id": "w1", "name": "flow"})
+    # fill the cache through the normal read path
+    for agent_id in ("a1", "a2"):
+        await repo.get_agent(agent_id)
+    await repo.get_workflow("w1")
+    return db, repo, ChangeStreamInvalidator(db, repo, CACHED_COLLECTIONS)
+
+
+def _event(operation, coll, document=None, **extra):
+    change = {"operationType": operation, "ns": {"db": "change_stream_test", "coll": coll}, **extra}
+    if document is not None:
+        change["fullDocument"] = document
+    return change
+
+
+def test_update_event_evicts_only_the_changed_document():
+    async def run():
+        db, repo, invalidator = await _repository()
+        generation = repo._cache_generation["agents"]
+
+        await db.agents.update_one({"agent_id": "a1"}, {"$set": {"name": "renamed"}})
+        # the cache still serves the stale copy until the event arrives
+        assert (await repo.get_agent("a1"))["name"] == "first"
+
+        doc = await db.agents.find_one({"agent_id": "a1"})
+        invalidator.handle(_event("update", "agents", doc, documentKey={"_id": doc["_id"]}))
+
+        assert repo._doc_cache["agents"].get("a1") is None
+        assert repo._doc_cache["agents"].get("a2") is not None
+        assert repo._doc_cache["workflows"].get("w1") is not None
+        assert repo._cache_generation["agents"] == generation + 1
+        assert (await repo.get_agent("a1"))["name"] == "renamed"
+        assert invalidator.events == 1
+
+    asyncio.run(run())
+
+
+def test_delete_event_clears_the_collection_cache():
+    async def run():
+        db, repo, invalidator = await _repository()
+        generation = repo._cache_generation["agents"]
+
+        doc = await db.agents.find_one({"agent_id": "a2"})
+        await db.agents.delete_one({"_id": doc["_id"]})
+        # deletes carry only the _id, so every cached agent goes
+        invalidator.handle(_event("delete", "agents", documentKey={"_id": doc["_id"]}))
+
+        assert repo._doc_cache["agents"].get("a1") is None
+        assert repo._doc_cache["agents"].get("a2") is None
+        assert repo._doc_cache["workflows"].get("w1") is not None
+        assert repo._cache_generation["agents"] == generation + 1
+        assert await repo.get_agent("a2") is None
+
+    asyncio.run(run())
+
+
+def test_event_during_a_read_keeps_the_stale_document_out_of_the_cache():
+    async def run():
+        db, repo, invalidator = await _repository()
+        repo.invalidate_cached("agents")
+        collection = repo.agents_collection
+        find_one = collection.find_one
+
+        async def racing_find_one(*args, **kwargs):
+            doc = await find_one(*args, **kwargs)
+            # another process updates the agent while this read is in flight
+            invalidator.handle(_event("update", "agents", {**doc, "name": "newer"}))
+            return doc
+
+        collection.find_one = racing_find_one
+        try:
+            assert (await repo.get_agent("a1"))["name"] == "first"
+        finally:
+            collection.find_one = find_one
+        assert repo._doc_cache["agents"].get("a1") is None
+
+    asyncio.run(run())
+
+
+def test_events_for_other_collections_are_ignored():
+    async def run():
+        _, repo, invalidator = await _repository()
+        generations = dict(repo._cache_generation)
+
+        invalidator.handle(_event("update", "tasks", {"task_id": "t1"}))
+
+        assert repo._cache_generation == generations
+        assert repo._doc_cache["agents"].get("a1") is not None
+        assert invalidator.events == 1
+
+    asyncio.run(run())
@@ -0,0 +1,178 @@
+"""
+ChatSessionStore: LRU and idle eviction, pinning, rehydration and delete
+"""
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services import chat_session_store  # noqa: E402
+from services.chat_history import ChatHistory  # noqa: E402
+from services.chat_session_store import ChatSessionStore  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(chat_session_store, "time", fake)
+    return fake
+
+
+def _store(max_sessions=2, idle_ttl=60):
+    store = ChatSessionStore(mongomock_motor.AsyncMongoMockClient()["chat_session_store_test"])
+    store.max_sessions = max_sessions
+    store.idle_ttl = idle_ttl
+    return store
+
+
+def _chat(text="hello"):
+    history = ChatHistory("be brief")
+    history.append("user", text)
+    return {"model": "gpt-4o", "system_message": "be brief", "history": history, "summary_task": None}
+
+
+def _messages(chat):
+    return chat["history"].to_dict()["messages"]
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    async def run():
+        store = _store()
+        store.put("s1", _chat())
+        store.put("s2", _chat())
+        clock.now += 1
+        await store.get("s1")  # s2 is now the least recently used
+        store.put("s3", _chat())
+
+        assert list(store) == ["s1", "s3"]
+        assert store.evictions == {"lru": 1, "idle": 0}
+        assert store.pending() == 1
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_idle_sessions_are_evicted(clock):
+    async def run():
+        store = _store(max_sessions=10)
+        store.put("s1", _chat())
+        clock.now += 30
+        store.put("s2", _chat())
+        clock.now += 45  # s1 idle for 75s, s2 for 45s
+
+        store.sweep()
+        assert list(store) == ["s2"]
+        assert store.evictions == {"lru": 0, "idle": 1}
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_pinned_session_is_not_evicted(clock):
+    async def run():
+        store = _store(max_sessions=1)
+        store.put("s1", _chat())
+        async with store.use("s1") as chat:
+            store.put("s2", _chat())
+            clock.now += 120
+            store.sweep()
+            assert "s1" in store and "s2" not in store
+            chat["history"].append("assistant", "reply")
+        # unpinned: it may be evicted again, and the reply is spilled with it
+        assert store.stats()["pinned_sessions"] == 0
+        store.put("s3", _chat())
+        assert "s1" not in store
+        assert [m["content"] for m in _messages(store._spill["s1"])] == ["hello", "reply"]
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_rehydrate_from_spill_buffer(clock):
+    async def run():
+        store = _store(max_sessions=1)
+        store.put("s1", _chat("first"))
+        store.put("s2", _chat("second"))
+        assert "s1" in store._spill
+
+        chat = await store.get("s1")
+        assert [m["content"] for m in _messages(chat)] == ["first"]
+        assert "s1" in store and "s1" not in store._spill
+        assert store.rehydrated == 1
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_rehydrate_from_mongo_after_flush(clock):
+    async def run():
+        store = _store(max_sessions=1)
+        store.put("s1", _chat("first"))
+        store.put("s2", _chat("second"))
+        await store.flush()
+        assert store.spilled == 1 and not store._spill
+
+        chat = await store.get("s1")
+        assert [m["content"] for m in _messages(chat)] == ["first"]
+        assert "s1" in store
+        assert store.rehydrated == 1
+        assert await store.get("missing") is None
+        assert store.rehydrate_misses == 1
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_delete_forgets_the_session_everywhere(clock):
+    async def run():
+        store = _store(max_sessions=1)
+        store.put("s1", _chat())
+        store.put("s2", _chat())
+        await store.flush()
+
+        assert await store.delete("s2") is not None
+        assert await store.delete("s1") is None  # spilled, not resident
+        await store.flush()
+
+        assert await store.collection.count_documents({}) == 0
+        assert await store.get("s1") is None
+        assert await store.get("s2") is None
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_delete_during_load_keeps_the_session_deleted(clock):
+    async def run():
+        store = _store(max_sessions=1)
+        store.put("s1", _chat())
+        store.put("s2", _chat())
+        await store.flush()
+
+        find_one = store.collection.find_one
+
+        async def racing_find_one(*args, **kwargs):
+            doc = await find_one(*args, **kwargs)
+            await store.delete("s1")  # lands while the spilled copy is being read
+            return doc
+
+        store.collection.find_one = racing_find_one
+        assert await store.get("s1") is None
+        store.collection.find_one = find_one
+
+        assert "s1" not in store
+        assert store._spill == {"s1": None}
+        await store.flush()
+        assert await store.collection.find_one({"_id": "s1"}) is None
+        await store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,167 @@
+"""
+Rate limiting: the GCRA step and the in-process and shared-memory backends
+"""
+import asyncio
+import subprocess
+import sys
+import time
+import uuid
+from multiprocessing import resource_tracker
+
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import InProcessRateLimiter, SharedMemoryRateLimiter, gcra_step
+
+# 60 requests per minute: one request earns back every second
+RATE, BURST = 60, 3
+
+
+def _steps(times, tat=None):
+    results = []
+    for now in times:
+        tat, result = gcra_step(tat, now, RATE, BURST)
+        results.append(result)
+    return tat, results
+
+
+def test_burst_is_allowed_back_to_back_then_rejected():
+    tat, results = _steps([0.0] * 4)
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert all(r.limit == BURST for r in results)
+    # a rejected request leaves the stored TAT unchanged
+    assert tat == 3.0
+
+
+def test_one_request_is_earned_back_per_emission_interval():
+    tat, _ = _steps([0.0] * 3)
+    _, early = gcra_step(tat, 0.9, RATE, BURST)
+    assert not early.allowed
+
+    tat, refilled = gcra_step(tat, 1.0, RATE, BURST)
+    assert refilled.allowed and refilled.remaining == 0
+    _, again = gcra_step(tat, 1.0, RATE, BURST)
+    assert not again.allowed
+
+    # idle long enough and the whole burst is back
+    _, full = gcra_step(tat, 60.0, RATE, BURST)
+    assert full.allowed and full.remaining == BURST - 1
+
+
+def test_retry_after_and_reset_values():
+    tat, results = _steps([0.0] * 3)
+    assert [r.reset_after for r in results] == [1.0, 2.0, 3.0]
+    assert all(r.retry_after == 0.0 for r in results)
+
+    _, rejected = gcra_step(tat, 0.25, RATE, BURST)
+    assert rejected.retry_after == pytest.approx(0.75)
+    assert rejected.reset_after == pytest.approx(2.75)
+    assert rejected.headers() == {
+        "X-RateLimit-Limit": "3",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "3",
+        "Retry-After": "1",
+    }
+    assert "Retry-After" not in results[0].headers()
+
+
+def test_burst_and_rate_are_at_least_one():
+    _, first = gcra_step(None, 0.0, 0, 0)
+    _, second = gcra_step(60.0, 0.0, 0, 0)
+    assert first.allowed and first.limit == 1 and first.reset_after == 60.0
+    assert not second.allowed and second.retry_after == 60.0
+
+
+def test_in_process_limiter_keeps_keys_apart_and_resets():
+    async def run():
+        limiter = InProcessRateLimiter()
+        assert [(await limiter.check("a", RATE, BURST)).allowed for _ in range(4)] == [True, True, True, False]
+        assert (await limiter.check("b", RATE, BURST)).allowed
+        await limiter.reset("a")
+        assert (await limiter.check("a", RATE, BURST)).remaining == BURST - 1
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def shm_limiter(tmp_path):
+    limiter = SharedMemoryRateLimiter(
+        shm_name=f"uap_test_{uuid.uuid4().hex[:12]}", slots=64, lock_path=str(tmp_path / "rate.lock"), lock_stripes=1,
+    )
+    yield limiter
+    shm = limiter._shm
+    asyncio.run(limiter.close())
+    # the limiter keeps the segment out of the resource tracker; unlink() expects it there
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def test_shared_memory_limiter_counts_and_resets(shm_limiter):
+    async def run():
+        assert [(await shm_limiter.check("a", RATE, BURST)).allowed for _ in range(4)] == [True, True, True, False]
+        assert (await shm_limiter.check("b", RATE, BURST)).allowed
+        await shm_limiter.reset("a")
+        assert (await shm_limiter.check("a", RATE, BURST)).remaining == BURST - 1
+
+    asyncio.run(run())
+
+
+def test_shared_memory_lock_backs_off_exponentially(shm_limiter, monkeypatch):
+    contended = iter(range(10))
+    locked = shm_limiter._locked
+
+    def flaky_locked(group, op):
+        if next(contended, None) is not None:
+            raise BlockingIOError
+        locked(group, op)
+
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(shm_limiter, "_locked", flaky_locked)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    asyncio.run(shm_limiter._acquire(0))
+    shm_limiter._locked(0, rate_limiter.fcntl.LOCK_UN)
+
+    assert delays[:4] == [0.0, 0.0001, 0.0002, 0.0004]
+    assert max(delays) == rate_limiter.SHM_LOCK_RETRY_MAX_DELAY
+    assert delays == sorted(delays)
+
+
+def test_shared_memory_lock_held_by_another_worker_does_not_block_the_loop(shm_limiter, tmp_path):
+    # another process holds the stripe lock for a while, as a stuck worker would
+    holder = subprocess.Popen([sys.executable, "-c", (
+        "import fcntl, os, time\n"
+        f"fd = os.open({str(tmp_path / 'rate.lock')!r}, os.O_RDWR)\n"
+        "fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)\n"
+        "print('locked', flush=True)\n"
+        "time.sleep(0.3)\n"
+    )], stdout=subprocess.PIPE, text=True)
+    assert holder.stdout.readline().strip() == "locked"
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+        result = await shm_limiter.check("a", RATE, BURST)
+        waited = time.monotonic() - started
+        ticking.cancel()
+        return result, waited, ticks
+
+    try:
+        result, waited, ticks = asyncio.run(run())
+    finally:
+        holder.wait()
+    assert result.allowed
+    assert waited >= 0.1
+    assert ticks >= 5  # the loop kept running while the check waited for the lock